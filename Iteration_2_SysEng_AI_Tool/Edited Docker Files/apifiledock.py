@@ -1,12 +1,13 @@
-import pypyodbc as odbc  # pip install pypyodbc
 import google.generativeai as genai
-import spacy
-import re
-from typing import Dict, List, Any
+import column_profiling
+import db_backends
+from nlp_pipeline import get_nlp
+import requirement_rules
+import system_taxonomy
+from typing import Dict, List, Any, Iterable
 import PyPDF2  # Import the PyPDF2 library
 from io import BytesIO
 import base64
-import os
 
 # For Graphormer integration and visualization
 import numpy as np
@@ -15,9 +16,6 @@ from transformers import GraphormerConfig, GraphormerModel
 import matplotlib.pyplot as plt
 from sklearn.decomposition import PCA  # principal component analysis
 
-# Load spaCy NLP model
-nlp = spacy.load("en_core_web_sm")
-
 def initialize_api(api_key: str) -> bool:
     """Initialize the Gemini API."""
     if not api_key:
@@ -31,109 +29,90 @@ def initialize_api(api_key: str) -> bool:
         print(f"Error initializing API: {e}")
         return False
 
-def connect_to_db():
-    """Establish a connection to the MS SQL Server database using ODBC with environment variables."""
-    try:
-        # Get database connection parameters from environment variables
-        db_server = os.environ.get("DB_SERVER", "XXX")
-        db_name = os.environ.get("DB_NAME", "HumeDatabaseMS")
-        db_user = os.environ.get("DB_USER", "XXX")
-        db_password = os.environ.get("DB_PASSWORD", "XXXXX")
-        
-        conn = odbc.connect(
-            "Driver={ODBC Driver 18 for SQL Server};"
-            f"Server={db_server};"
-            f"Database={db_name};"
-            f"Uid={db_user};"
-            f"Pwd={db_password};"
-            "TrustServerCertificate=yes;"
-            "Connection Timeout=300;"
-        )
-        return conn
-    except Exception as e:
-        print(f"Database connection error: {e}")
-        return None
+# Connection pooling, schema caching and sampling live in db_backends; DB_BACKEND
+# selects the driver (MS SQL unless configured otherwise).
+_db = db_backends.get_backend(db_backends.MSSQLBackend.name)
 
 def list_all_tables() -> List[str]:
-    """Retrieve a list of all tables in the 'dbo' schema."""
-    conn = connect_to_db()
-    if not conn:
-        return []
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = 'dbo';")
-        tables = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        if tables:
-            print(f"Tables have been retrieved successfully: {tables}")
-        else:
-            print("No tables found in the 'dbo' schema.")
-        return tables
-    except Exception as e:
-        print(f"Error fetching table list: {e}")
-        return []
+    """Retrieve a list of all tables in the backend's schema ('dbo' on MS SQL)."""
+    return _db.list_all_tables()
 
 def fetch_table_structure() -> Dict[str, Dict[str, str]]:
-    """Retrieve column details for all tables in the database."""
-    conn = connect_to_db()
-    if not conn:
-        return {}
-    table_structure = {}
-    try:
-        cursor = conn.cursor()
-        tables = list_all_tables()
-        for table in tables:
-            cursor.execute(f"""
-                SELECT COLUMN_NAME, DATA_TYPE
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_NAME = '{table}';
-            """)
-            columns = cursor.fetchall()
-            table_structure[table] = {col[0]: col[1] for col in columns}
-        conn.close()
-        return table_structure
-    except Exception as e:
-        print(f"Error fetching table structures: {e}")
-        return {}
+    """
+    Retrieve column details for all tables in the database, with primary and foreign keys marked.
+    Served from a process-wide cache that is revalidated after SCHEMA_CACHE_TTL seconds.
+    """
+    return _db.fetch_table_structure()
+
+def fetch_relevant_table_structure(query: str, required_tables: Iterable[str] = ()) -> str:
+    """
+    Compact structure of the tables most relevant to query (plus required_tables and their
+    foreign-key neighbours), bounded by SCHEMA_CONTEXT_TOKEN_BUDGET however large the database is.
+    """
+    return _db.fetch_relevant_table_structure(query, required_tables)
+
+def invalidate_table_structure() -> None:
+    """Drop the cached schema (e.g. after a migration) so the next call re-introspects."""
+    _db.invalidate_table_structure()
 
 def fetch_specific_table(table_name: str, limit: int = 5) -> List[Any]:
     """
-    Fetch up to `limit` rows from the given table_name.
-    Returns a list of tuples (one tuple per row).
+    Fetch a representative sample of up to `limit` rows from the given table_name.
+    Returns a list of tuples (one tuple per row); see table_sampling for the sampling
+    methods and the per-column size cap.
     """
-    conn = connect_to_db()
-    if not conn:
-        return []
-    try:
-        cursor = conn.cursor()
-        if not re.match(r'^\w+$', table_name):
-            raise ValueError("Invalid table name format.")
-        query = f"SELECT TOP {limit} * FROM {table_name};"
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        conn.close()
-        return rows
-    except Exception as e:
-        print(f"Error fetching data from table '{table_name}': {e}")
-        return []
+    return _db.fetch_specific_table(table_name, limit)
 
-def detect_table_name(user_text: str) -> str:
+async def list_all_tables_async() -> List[str]:
+    """Async counterpart of list_all_tables (asyncpg on Postgres, the DB thread pool otherwise)."""
+    return await _db.list_all_tables_async()
+
+async def fetch_table_structure_async() -> Dict[str, Dict[str, str]]:
+    """Async counterpart of fetch_table_structure (shares its schema cache)."""
+    return await _db.fetch_table_structure_async()
+
+async def fetch_relevant_table_structure_async(query: str, required_tables: Iterable[str] = ()) -> str:
+    """Async counterpart of fetch_relevant_table_structure (shares its schema cache)."""
+    return await _db.fetch_relevant_table_structure_async(query, required_tables)
+
+async def fetch_specific_table_async(table_name: str, limit: int = 5) -> List[Any]:
+    """Async counterpart of fetch_specific_table (asyncpg on Postgres, the DB thread pool otherwise)."""
+    return await _db.fetch_specific_table_async(table_name, limit)
+
+def fetch_specific_tables(table_names: Iterable[str], limit: int = 5) -> Dict[str, List[Any]]:
+    """Sample rows for several tables at once; the tables are fetched concurrently."""
+    return _db.fetch_specific_tables(table_names, limit)
+
+async def fetch_specific_tables_async(table_names: Iterable[str], limit: int = 5) -> Dict[str, List[Any]]:
+    """Async counterpart of fetch_specific_tables."""
+    return await _db.fetch_specific_tables_async(table_names, limit)
+
+def profile_tables(table_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Column statistics (null ratio, range, distinct count, top values) for several tables, profiled concurrently."""
+    return _db.profile_tables(table_names)
+
+async def profile_tables_async(table_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Async counterpart of profile_tables."""
+    return await _db.profile_tables_async(table_names)
+
+def detect_table_names(user_text: str) -> List[str]:
     """
-    Use regex to detect a table name mentioned in user_text.
-    Example: if user_text contains 'table system_requirements', returns 'system_requirements'.
+    Detect every real table mentioned in user_text, e.g. 'table system_requirements' or just
+    "the system requirements", matched fuzzily against a cached index of the database's table names.
     """
-    pattern = re.compile(r'\btable\s+([a-zA-Z0-9_]+)', re.IGNORECASE)
-    match = pattern.search(user_text)
-    if match:
-        return match.group(1)
-    return ""
+    return _db.detect_tables(user_text)
+
+def detect_table_name(user_text: str) -> str:
+    """The first table mentioned in user_text (see detect_table_names), or ""."""
+    names = detect_table_names(user_text)
+    return names[0] if names else ""
 
 def enhance_user_requirements(user_text: str) -> str:
     """
     Process and enhance the free-form user input using NLP.
     Extracts key phrases and entities to form a more precise prompt.
     """
-    doc = nlp(user_text)
+    doc = get_nlp()(user_text)
     key_phrases = set(chunk.text.strip() for chunk in doc.noun_chunks)
     key_phrases.update(ent.text.strip() for ent in doc.ents)
     enhanced_text = user_text.strip()
@@ -166,17 +145,11 @@ def generate_system_designs(user_requirements: str, examples: Any = None, pdf_da
         }
     try:
         processed_requirements = enhance_user_requirements(user_requirements)
-        table_structure = fetch_table_structure()
-        referenced_table = detect_table_name(user_requirements)
+        referenced_tables = detect_table_names(user_requirements)
+        table_structure = fetch_relevant_table_structure(user_requirements, referenced_tables)
         table_data_string = ""
-        if referenced_table:
-            rows = fetch_specific_table(referenced_table, limit=5)
-            if rows:
-                table_data_string = f"Sample rows from '{referenced_table}':\n"
-                for i, row in enumerate(rows, start=1):
-                    table_data_string += f"Row {i}: {row}\n"
-            else:
-                table_data_string = f"No data found for table '{referenced_table}'.\n"
+        for referenced_table, profile in profile_tables(referenced_tables).items():
+            table_data_string += column_profiling.describe_profile(referenced_table, profile) + "\n"
         if pdf_data:
             pdf_text = extract_text_from_pdf(pdf_data)
             processed_requirements += f"\nPDF data: {pdf_text}"
@@ -342,41 +315,10 @@ def generate_graphormer_visualization(graph_data, pdf_data=None):
     try:
         # Extract requirements and perform deeper analysis
         user_reqs = graph_data.get('user_requirements', '')
-        doc = nlp(user_reqs)
-        
-        # Detect system type from user requirements
-        system_type = "Generic System"  # Default system type
-        system_id = "SYS"  # Default system ID
-        
-        # Detect system types based on keywords
-        system_keywords = {
-            "autonomous vehicle": ("Autonomous Vehicle", "AV"),
-            "self-driving": ("Autonomous Vehicle", "AV"),
-            "smart home": ("Smart Home System", "SHS"),
-            "energy management": ("Energy Management System", "EMS"),
-            "healthcare": ("Healthcare System", "HCS"),
-            "medical": ("Medical System", "MED"),
-            "finance": ("Financial System", "FIN"),
-            "banking": ("Banking System", "BNK"),
-            "security": ("Security System", "SEC"),
-            "manufacturing": ("Manufacturing System", "MFG"),
-            "education": ("Education System", "EDU"),
-            "retail": ("Retail System", "RET"),
-            "transportation": ("Transportation System", "TRN"),
-            "logistics": ("Logistics System", "LOG"),
-            "communication": ("Communication System", "COM"),
-            "network": ("Network System", "NET"),
-            "data": ("Data Management System", "DMS"),
-            "cloud": ("Cloud System", "CLD"),
-            "iot": ("IoT System", "IOT"),
-            "robot": ("Robotic System", "ROB")
-        }
+        doc = get_nlp()(user_reqs)
         
-        for keyword, (name, id_code) in system_keywords.items():
-            if keyword in user_reqs.lower():
-                system_type = name
-                system_id = id_code
-                break
+        # Detect system type from user requirements (weighted taxonomy, see system_taxonomy.json)
+        system_type, system_id = system_taxonomy.detect_system_type(user_reqs)
         
         # Extract technical specifications and requirements
         specs = {
@@ -386,17 +328,10 @@ def generate_graphormer_visualization(graph_data, pdf_data=None):
             'verification': []
         }
         
-        # Parse user input for specific requirements
-        for sent in doc.sents:
-            text = sent.text.lower()
-            if any(term in text for term in ['speed', 'acceleration', 'time', 'performance', 'efficiency', 'throughput', 'response']):
-                specs['performance'].append(sent.text)
-            if any(term in text for term in ['balance', 'stability', 'control', 'reliability', 'robustness', 'consistent']):
-                specs['stability'].append(sent.text)
-            if any(term in text for term in ['safe', 'emergency', 'protect', 'security', 'privacy', 'backup']):
-                specs['safety'].append(sent.text)
-            if any(term in text for term in ['verify', 'validate', 'test', 'simulation', 'check', 'audit', 'monitor']):
-                specs['verification'].append(sent.text)
+        # Parse user input for specific requirements (compiled rules, one pass over the Doc)
+        categories = requirement_rules.get_rule_engine(get_nlp()).analyze(doc)["categories"]
+        for category in specs:
+            specs[category].extend(sentence for _, sentence in categories[category])
 
         # Define system-specific components with detailed relationships
         nodes = [
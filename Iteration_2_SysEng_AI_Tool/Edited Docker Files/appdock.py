@@ -1,7 +1,10 @@
 import os
 import base64
+import time
 from flask import Flask, render_template, request, jsonify, session
 from io import BytesIO
+import nlp_pipeline
+import artifact_store
 import api_integration  # This module contains your integrated API, DB, and Graphormer-based visualization functions
 
 # Set your API key from environment variable
@@ -11,6 +14,10 @@ if not api_key:
 else:
     api_integration.initialize_api(api_key)
 
+# Load the spaCy pipeline in the background so the first request does not pay for it
+if os.environ.get("NLP_WARMUP", "1") == "1":
+    nlp_pipeline.warmup_in_background()
+
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "VT202527")  # Get from environment or use default
 
@@ -62,22 +69,30 @@ def combined():
     example_system_designs = {"design": {"details": [{"example": "system design structure"}]}}
     example_verification_requirements = {"verification": {"details": [{"example": "verification requirement structure"}]}}
 
-    # Generate outputs from the integration module.
+    # Generate outputs from the integration module, timing each call for the artifact store.
+    timings = {}
+    started = time.perf_counter()
     try:
         system_design_output = api_integration.generate_system_designs(prompt, examples_design, pdf_data)
     except Exception as e:
         system_design_output = f"Error generating system design: {str(e)}"
+    timings["system_design"] = time.perf_counter() - started
     
+    started = time.perf_counter()
     try:
         verification_output = api_integration.create_verification_requirements_models(prompt, examples_verif, pdf_data)
     except Exception as e:
         verification_output = f"Error generating verification requirements: {str(e)}"
+    timings["verification_requirements"] = time.perf_counter() - started
     
+    started = time.perf_counter()
     try:
         traceability_output = api_integration.get_traceability(prompt, example_system_requirements, example_system_designs)
     except Exception as e:
         traceability_output = f"Error generating traceability: {str(e)}"
+    timings["traceability"] = time.perf_counter() - started
     
+    started = time.perf_counter()
     try:
         verification_conditions_output = api_integration.get_verification_conditions(
             prompt,
@@ -87,7 +102,16 @@ def combined():
         )
     except Exception as e:
         verification_conditions_output = f"Error generating verification conditions: {str(e)}"
+    timings["verification_conditions"] = time.perf_counter() - started
     
+    # Persist the outputs off the request path, so reruns are not lost with the session.
+    artifact_store.persist_run(prompt, {
+        "system_design": system_design_output,
+        "verification_requirements": verification_output,
+        "traceability": traceability_output,
+        "verification_conditions": verification_conditions_output,
+    }, timings, source="appdock")
+
     # Generate the system visualization based on user input and generated outputs
     try:
         # Create graph data structure with user requirements
@@ -4,6 +4,8 @@ from requirements import example_system_requirements
 from system_designs import example_system_designs
 from verification_requirements import example_verification_requirements
 import api_integration
+import artifact_store
+import time
 
 class SystemModelApp:
     def __init__(self, root: tk.Tk):
@@ -92,12 +94,17 @@ class SystemModelApp:
             if table_name and f"table {table_name}" not in user_reqs.lower():
                 user_reqs += f"\nPlease reference table {table_name} for proof."
             
+            started = time.perf_counter()
             result = api_integration.generate_system_designs(
                 user_reqs, 
                 example_system_requirements, 
                 example_system_designs
             )
             self.results = result
+            artifact_store.persist_run(
+                user_reqs, {"system_design": result}, {"system_design": time.perf_counter() - started},
+                source="New UI Runner",
+            )
             messagebox.showinfo("Success", "Analysis completed successfully")
         except Exception as e:
             messagebox.showerror("Error", f"Analysis failed: {str(e)}")
@@ -4,6 +4,8 @@ from requirements import example_system_requirements
 from system_designs import example_system_designs
 from verification_requirements import example_verification_requirements
 import api_integration
+import artifact_store
+import time
 
 class SystemModelApp:
     def __init__(self, root: tk.Tk):
@@ -86,21 +88,31 @@ class SystemModelApp:
 
     def run_analysis(self):
         try:
+            outputs, timings = {}, {}
+            started = time.perf_counter()
             result = api_integration.generate_system_designs(self.system_requirements, example_system_requirements, example_system_designs)
+            outputs["system_design"], timings["system_design"] = result, time.perf_counter() - started
             self.results = result
 
             if self.verification_help.get():
+                started = time.perf_counter()
                 verification_result = api_integration.create_verification_requirements_models(self.system_requirements, example_system_requirements, example_verification_requirements, example_system_designs)
+                outputs["verification_requirements"], timings["verification_requirements"] = verification_result, time.perf_counter() - started
                 self.results += "\n\n" + verification_result
 
             if self.traceability_help.get():
+                started = time.perf_counter()
                 traceability_result = api_integration.get_traceability(self.system_requirements, example_system_requirements, example_system_designs)
+                outputs["traceability"], timings["traceability"] = traceability_result, time.perf_counter() - started
                 self.results += "\n\n" + traceability_result
 
             if self.verification_conditions.get():
+                started = time.perf_counter()
                 conditions_result = api_integration.get_verification_conditions(self.system_requirements, example_system_requirements, example_verification_requirements, example_system_designs)
+                outputs["verification_conditions"], timings["verification_conditions"] = conditions_result, time.perf_counter() - started
                 self.results += "\n\n" + conditions_result
 
+            artifact_store.persist_run(self.system_requirements, outputs, timings, source="UI_Runner")
             messagebox.showinfo("Success", "Analysis completed successfully")
         except Exception as e:
             messagebox.showerror("Error", f"Analysis failed: {str(e)}")
@@ -1,12 +1,18 @@
-import pypyodbc as odbc  # pip install pypyodbc
 import openai
-import spacy
-import re
-from typing import Dict, List, Any
+import column_profiling
+import db_backends
+from nlp_pipeline import get_nlp, pipe_docs
+import nlp_cache
+import requirement_rules
+import requirement_dedup
+from typing import Dict, List, Any, Iterable, Iterator, Optional
 import PyPDF2  # Import the PyPDF2 library
 from io import BytesIO
+import pdf_extraction
+import pdf_text_cache
+import pdf_retrieval
+import corpus_store
 import base64
-import os
 import requests  # Added for image downloading
 
 # For Graphormer integration and visualization
@@ -16,9 +22,6 @@ import json
 from pathlib import Path
 import graphviz  # Add this import at the top with other imports
 
-# Load spaCy NLP model
-nlp = spacy.load("en_core_web_sm")
-
 def initialize_api(api_key: str) -> bool:
     """Initialize the OpenAI API using the provided API key."""
     if not api_key:
@@ -32,130 +35,148 @@ def initialize_api(api_key: str) -> bool:
         print(f"Error initializing API: {e}")
         return False
 
-def connect_to_db():
-    """Establish a connection to the MS SQL Server database using ODBC with environment variables."""
-    try:
-        # Get database connection parameters from environment variables
-        db_server = os.environ.get("DB_SERVER", "X")
-        db_name = os.environ.get("DB_NAME", "X")
-        db_user = os.environ.get("DB_USER", "X")
-        db_password = os.environ.get("DB_PASSWORD", "X")
-        
-        conn = odbc.connect(
-            "Driver={ODBC Driver 18 for SQL Server};"
-            f"Server={db_server};"
-            f"Database={db_name};"
-            f"Uid={db_user};"
-            f"Pwd={db_password};"
-            "TrustServerCertificate=yes;"
-            "Connection Timeout=300;"
-        )
-        return conn
-    except Exception as e:
-        print(f"Database connection error: {e}")
-        return None
+# Connection pooling, schema caching and sampling live in db_backends; DB_BACKEND
+# selects the driver (MS SQL unless configured otherwise).
+_db = db_backends.get_backend(db_backends.MSSQLBackend.name)
 
 def list_all_tables() -> List[str]:
-    """Retrieve a list of all tables in the 'dbo' schema."""
-    conn = connect_to_db()
-    if not conn:
-        return []
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = 'dbo';")
-        tables = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        if tables:
-            print(f"Tables have been retrieved successfully: {tables}")
-        else:
-            print("No tables found in the 'dbo' schema.")
-        return tables
-    except Exception as e:
-        print(f"Error fetching table list: {e}")
-        return []
+    """Retrieve a list of all tables in the backend's schema ('dbo' on MS SQL)."""
+    return _db.list_all_tables()
 
 def fetch_table_structure() -> Dict[str, Dict[str, str]]:
-    """Retrieve column details for all tables in the database."""
-    conn = connect_to_db()
-    if not conn:
-        return {}
-    table_structure = {}
-    try:
-        cursor = conn.cursor()
-        tables = list_all_tables()
-        for table in tables:
-            cursor.execute(f"""
-                SELECT COLUMN_NAME, DATA_TYPE
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_NAME = '{table}';
-            """)
-            columns = cursor.fetchall()
-            table_structure[table] = {col[0]: col[1] for col in columns}
-        conn.close()
-        return table_structure
-    except Exception as e:
-        print(f"Error fetching table structures: {e}")
-        return {}
+    """
+    Retrieve column details for all tables in the database, with primary and foreign keys marked.
+    Served from a process-wide cache that is revalidated after SCHEMA_CACHE_TTL seconds.
+    """
+    return _db.fetch_table_structure()
 
-def fetch_specific_table(table_name: str, limit: int = 5) -> List[Any]:
+def fetch_relevant_table_structure(query: str, required_tables: Iterable[str] = ()) -> str:
     """
-    Fetch up to `limit` rows from the given table_name.
-    Returns a list of tuples (one tuple per row).
+    Compact structure of the tables most relevant to query (plus required_tables and their
+    foreign-key neighbours), bounded by SCHEMA_CONTEXT_TOKEN_BUDGET however large the database is.
     """
-    conn = connect_to_db()
-    if not conn:
-        return []
-    try:
-        cursor = conn.cursor()
-        if not re.match(r'^\w+$', table_name):
-            raise ValueError("Invalid table name format.")
-        query = f"SELECT TOP {limit} * FROM {table_name};"
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        conn.close()
-        return rows
-    except Exception as e:
-        print(f"Error fetching data from table '{table_name}': {e}")
-        return []
+    return _db.fetch_relevant_table_structure(query, required_tables)
 
-def detect_table_name(user_text: str) -> str:
+def invalidate_table_structure() -> None:
+    """Drop the cached schema (e.g. after a migration) so the next call re-introspects."""
+    _db.invalidate_table_structure()
+
+def fetch_specific_table(table_name: str, limit: int = 5) -> List[Any]:
     """
-    Use regex to detect a table name mentioned in user_text.
-    Example: if user_text contains 'table system_requirements', returns 'system_requirements'.
+    Fetch a representative sample of up to `limit` rows from the given table_name.
+    Returns a list of tuples (one tuple per row); see table_sampling for the sampling
+    methods and the per-column size cap.
     """
-    pattern = re.compile(r'\btable\s+([a-zA-Z0-9_]+)', re.IGNORECASE)
-    match = pattern.search(user_text)
-    if match:
-        return match.group(1)
-    return ""
+    return _db.fetch_specific_table(table_name, limit)
 
-def enhance_user_requirements(user_text: str) -> str:
+async def list_all_tables_async() -> List[str]:
+    """Async counterpart of list_all_tables (asyncpg on Postgres, the DB thread pool otherwise)."""
+    return await _db.list_all_tables_async()
+
+async def fetch_table_structure_async() -> Dict[str, Dict[str, str]]:
+    """Async counterpart of fetch_table_structure (shares its schema cache)."""
+    return await _db.fetch_table_structure_async()
+
+async def fetch_relevant_table_structure_async(query: str, required_tables: Iterable[str] = ()) -> str:
+    """Async counterpart of fetch_relevant_table_structure (shares its schema cache)."""
+    return await _db.fetch_relevant_table_structure_async(query, required_tables)
+
+async def fetch_specific_table_async(table_name: str, limit: int = 5) -> List[Any]:
+    """Async counterpart of fetch_specific_table (asyncpg on Postgres, the DB thread pool otherwise)."""
+    return await _db.fetch_specific_table_async(table_name, limit)
+
+def fetch_specific_tables(table_names: Iterable[str], limit: int = 5) -> Dict[str, List[Any]]:
+    """Sample rows for several tables at once; the tables are fetched concurrently."""
+    return _db.fetch_specific_tables(table_names, limit)
+
+async def fetch_specific_tables_async(table_names: Iterable[str], limit: int = 5) -> Dict[str, List[Any]]:
+    """Async counterpart of fetch_specific_tables."""
+    return await _db.fetch_specific_tables_async(table_names, limit)
+
+def profile_tables(table_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Column statistics (null ratio, range, distinct count, top values) for several tables, profiled concurrently."""
+    return _db.profile_tables(table_names)
+
+async def profile_tables_async(table_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Async counterpart of profile_tables."""
+    return await _db.profile_tables_async(table_names)
+
+def detect_table_names(user_text: str) -> List[str]:
     """
-    Process and enhance the free-form user input using NLP.
-    Extracts key phrases and entities to form a more precise prompt.
+    Detect every real table mentioned in user_text, e.g. 'table system_requirements' or just
+    "the system requirements", matched fuzzily against a cached index of the database's table names.
     """
-    doc = nlp(user_text)
-    key_phrases = set(chunk.text.strip() for chunk in doc.noun_chunks)
-    key_phrases.update(ent.text.strip() for ent in doc.ents)
-    enhanced_text = user_text.strip()
+    return _db.detect_tables(user_text)
+
+def detect_table_name(user_text: str) -> str:
+    """The first table mentioned in user_text (see detect_table_names), or ""."""
+    names = detect_table_names(user_text)
+    return names[0] if names else ""
+
+def _enhance_from_doc(user_text: str, doc: Any) -> str:
+    """Build the enhanced requirement text from an already parsed Doc."""
+    spans = sorted(list(doc.noun_chunks) + list(doc.ents), key=lambda span: span.start_char)
+    key_phrases = requirement_dedup.dedupe(list(dict.fromkeys(span.text.strip() for span in spans)))
+    # Paraphrased copies of a requirement are collapsed before they reach the prompt.
+    enhanced_text = requirement_dedup.dedupe_sentences(user_text)
     if key_phrases:
         enhanced_text += "\nKey concepts: " + ", ".join(key_phrases)
     if len(user_text.split()) < 20:
         enhanced_text += "\n[Note: The input is brief; more detail may yield a richer design.]"
+    return enhanced_text
+
+def enhance_user_requirements(user_text: str) -> str:
+    """
+    Process and enhance the free-form user input using NLP.
+    Extracts key phrases and entities to form a more precise prompt.
+    """
+    doc = nlp_cache.parse(user_text, get_nlp())
+    enhanced_text = _enhance_from_doc(user_text, doc)
     print("Enhanced User Requirements:")
     print(enhanced_text)
     return enhanced_text
 
-def extract_text_from_pdf(pdf_file: BytesIO) -> str:
-    """Extract text from the given PDF file."""
-    text = ""
+def enhance_user_requirements_batch(texts: Iterable[str], batch_size: Optional[int] = None,
+                                    n_process: Optional[int] = None) -> Iterator[str]:
+    """
+    Batch form of enhance_user_requirements for bulk requirement sets.
+    Texts go through nlp.pipe and enhanced texts are yielded in input order as they are ready.
+    """
+    for user_text, doc in pipe_docs(texts, batch_size, n_process):
+        yield _enhance_from_doc(user_text, doc)
+
+def _read_pdf_pages(pdf_file: BytesIO) -> Iterator[str]:
+    """
+    Stream the per-page text of the given PDF file as pages are extracted, reusing the cached pages
+    for identical PDF bytes. Large documents are sharded across processes. Raises if the PDF cannot
+    be parsed, so no partial page list reaches the page or index caches.
+    """
+    return pdf_text_cache.stream_pdf_pages(pdf_file, pdf_extraction.iter_pdf_pages)
+
+def extract_pages_from_pdf(pdf_file: BytesIO) -> List[str]:
+    """Extract per-page text from the given PDF file; [] if it cannot be parsed."""
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        for page in pdf_reader.pages:
-            text += page.extract_text()
+        return list(_read_pdf_pages(pdf_file))
     except Exception as e:
         print(f"Error reading PDF: {e}")
-    return text
+        return []
+
+def extract_text_from_pdf(pdf_file: BytesIO) -> str:
+    """Extract text from the given PDF file."""
+    return "".join(extract_pages_from_pdf(pdf_file))
+
+def build_reference_context(query: str, pdf_data: BytesIO = None) -> str:
+    """
+    Return the reference excerpts most relevant to query: from pdf_data when one is given,
+    otherwise from the pre-ingested reference corpus (see ingest_corpus.py).
+    """
+    if pdf_data:
+        try:
+            return pdf_retrieval.build_pdf_context(query, pdf_data, _read_pdf_pages)
+        except Exception as e:
+            print(f"Error reading PDF: {e}")
+            return ""
+    return corpus_store.build_corpus_context(query)
 
 def generate_system_designs(user_requirements: str, examples: Any = None, pdf_data: BytesIO = None) -> str:
     """Generate a concise system design document (500 words) incorporating provided data."""
@@ -167,19 +188,13 @@ def generate_system_designs(user_requirements: str, examples: Any = None, pdf_da
         }
     try:
         processed_requirements = enhance_user_requirements(user_requirements)
-        table_structure = fetch_table_structure()
-        referenced_table = detect_table_name(user_requirements)
+        referenced_tables = detect_table_names(user_requirements)
+        table_structure = fetch_relevant_table_structure(user_requirements, referenced_tables)
         table_data_string = ""
-        if referenced_table:
-            rows = fetch_specific_table(referenced_table, limit=5)
-            if rows:
-                table_data_string = f"Sample rows from '{referenced_table}':\n"
-                for i, row in enumerate(rows, start=1):
-                    table_data_string += f"Row {i}: {row}\n"
-            else:
-                table_data_string = f"No data found for table '{referenced_table}'.\n"
-        if pdf_data:
-            pdf_text = extract_text_from_pdf(pdf_data)
+        for referenced_table, profile in profile_tables(referenced_tables).items():
+            table_data_string += column_profiling.describe_profile(referenced_table, profile) + "\n"
+        pdf_text = build_reference_context(user_requirements, pdf_data)
+        if pdf_text:
             processed_requirements += f"\nPDF data: {pdf_text}"
         else:
             print("No PDF data provided; skipping PDF extraction.")
@@ -234,8 +249,8 @@ def create_verification_requirements_models(system_requirements: str, examples:
         }
     try:
         processed_requirements = enhance_user_requirements(system_requirements)
-        if pdf_data:
-            pdf_text = extract_text_from_pdf(pdf_data)
+        pdf_text = build_reference_context(system_requirements, pdf_data)
+        if pdf_text:
             processed_requirements += f"\nPDF data: {pdf_text}"
         else:
             print("No PDF data provided; skipping PDF extraction.")
@@ -362,61 +377,21 @@ def extract_important_phrases(text: str) -> list:
     - Named entities of type QUANTITY, CARDINAL, PERCENT, TIME, DATE, or ORDINAL.
     - Phrases mentioning models, equations, constraints, state machines, etc.
     """
-    doc = nlp(text)
-    keywords = [
-        "constraint", "model", "equation", "state machine", "differential equation",
-        "threshold", "limit", "performance", "acceleration", "speed", "force", "balance",
-        "representation", "convert", "compare", "problem space"
-    ]
-    # Lowercase keywords for matching
-    keywords = [k.lower() for k in keywords]
-
-    # 1. Extract entities with numbers/quantities
-    important_phrases = set()
-    for ent in doc.ents:
-        if ent.label_ in {"QUANTITY", "CARDINAL", "PERCENT", "TIME", "DATE", "ORDINAL"}:
-            important_phrases.add(ent.text.strip())
-        # Also add entities with numbers/units
-        if re.search(r"\d", ent.text) or re.search(r"\b(sec|second|mph|km/h|ms|g|kg|Hz|%)\b", ent.text, re.I):
-            important_phrases.add(ent.text.strip())
-
-    # 2. Extract noun chunks or sentences with keywords or numbers
-    for chunk in doc.noun_chunks:
-        chunk_text = chunk.text.strip()
-        if any(k in chunk_text.lower() for k in keywords):
-            important_phrases.add(chunk_text)
-        elif re.search(r"\d", chunk_text):
-            important_phrases.add(chunk_text)
-        elif re.search(r"\b(sec|second|mph|km/h|ms|g|kg|Hz|%)\b", chunk_text, re.I):
-            important_phrases.add(chunk_text)
-
-    # 3. Extract sentences with keywords or numbers
-    for sent in doc.sents:
-        sent_text = sent.text.strip()
-        if any(k in sent_text.lower() for k in keywords):
-            important_phrases.add(sent_text)
-        elif re.search(r"\d", sent_text):
-            important_phrases.add(sent_text)
-        elif re.search(r"\b(sec|second|mph|km/h|ms|g|kg|Hz|%)\b", sent_text, re.I):
-            important_phrases.add(sent_text)
-
-    # 4. Remove trivial/short/generic phrases
-    filtered = set()
-    for phrase in important_phrases:
-        if len(phrase) < 4:
-            continue
-        if phrase.lower() in {"i", "am", "a", "the", "it", "these", "this", "that"}:
-            continue
-        filtered.add(phrase)
-
-    # 5. Sort by appearance in text
-    def phrase_index(phrase):
-        try:
-            return text.index(phrase)
-        except ValueError:
-            return 1e9
-    sorted_phrases = sorted(filtered, key=phrase_index)
-    return sorted_phrases
+    return _important_phrases_from_doc(nlp_cache.parse(text, get_nlp()))
+
+def extract_important_phrases_batch(texts: Iterable[str], batch_size: Optional[int] = None,
+                                    n_process: Optional[int] = None) -> Iterator[list]:
+    """Batch form of extract_important_phrases; yields one phrase list per text, in input order."""
+    for _, doc in pipe_docs(texts, batch_size, n_process):
+        yield _important_phrases_from_doc(doc)
+
+def _important_phrases_from_doc(doc: Any) -> list:
+    """Phrase extraction for extract_important_phrases, working on an already parsed Doc."""
+    # Keyword, number and unit rules are compiled once in requirement_rules and applied
+    # to entities, noun chunks and sentences in a single pass; phrases come back in
+    # order of first appearance.
+    analysis = requirement_rules.get_rule_engine(get_nlp()).analyze(doc)
+    return [phrase for _, phrase in analysis["phrases"]]
 
 def generate_network_visualization(graph_data, pdf_data=None):
     """
@@ -1,7 +1,13 @@
 import os
 import base64
+import time
 from flask import Flask, render_template, request, jsonify, session
 from io import BytesIO
+from pdf_source import open_pdf_source
+from corpus_store import corpus_available
+import upload_jobs
+import nlp_pipeline
+import artifact_store
 import api_integration  # This module contains your integrated API, DB, and Graphormer-based visualization functions
 
 # Set your API key from environment variable
@@ -11,18 +17,17 @@ if not api_key:
 else:
     api_integration.initialize_api(api_key)
 
+# Load the spaCy pipeline in the background so the first request does not pay for it
+if os.environ.get("NLP_WARMUP", "1") == "1":
+    nlp_pipeline.warmup_in_background()
+
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "X")  # Get from environment or use default
 
-# Load the PDF training data from environment variable path
+# Prefer the pre-ingested reference corpus (built by ingest_corpus.py, opened lazily on first use).
+# Without one, map the PDF training data read-only; each request gets its own view of the shared pages
 pdf_path = "C://Users//X//X//Wach_PF_D_2023_main.pdf"
-try:
-    with open(pdf_path, "rb") as f:
-        pdf_data = BytesIO(f.read())
-    print(f"PDF loaded from {pdf_path}")
-except Exception as e:
-    pdf_data = None
-    print(f"Error loading PDF: {e}")
+pdf_source = None if corpus_available() else open_pdf_source(pdf_path)
 
 @app.route("/")
 def index():
@@ -32,6 +37,29 @@ def index():
     # Pass an initial null morphism image to the template
     return render_template("index.html", conversation=session.get("conversation", []), morphism_image=None)
 
+@app.route("/upload", methods=["POST"])
+def upload():
+    """
+    Accept a PDF as the raw request body (filename in the query string), stream it to disk
+    and queue background extraction. Poll /upload/<job_id> until its status is "done".
+    """
+    filename = request.args.get("filename", "upload.pdf")
+    try:
+        job = upload_jobs.start_upload(request.stream, filename)
+    except upload_jobs.UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except upload_jobs.InvalidUpload as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job), 202
+
+@app.route("/upload/<job_id>", methods=["GET"])
+def upload_status(job_id):
+    """Report the status of a background extraction job."""
+    job = upload_jobs.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Unknown upload."}), 404
+    return jsonify(job)
+
 @app.route("/combined", methods=["POST"])
 def combined():
     """
@@ -45,6 +73,12 @@ def combined():
     prompt = request.form.get("prompt", "").strip()
     if not prompt:
         return jsonify({"response": "Please enter a prompt."})
+
+    # A finished upload replaces the server-side reference PDF for this request
+    upload_id = request.form.get("upload_id", "").strip()
+    pdf_data = upload_jobs.open_upload_view(upload_id) if upload_id else None
+    if pdf_data is None:
+        pdf_data = pdf_source.open_view() if pdf_source else None
     
     # Example dictionaries for system design and verification requirements.
     examples_design = {
@@ -62,12 +96,16 @@ def combined():
     example_system_designs = {"design": {"details": [{"example": "system design structure"}]}}
     example_verification_requirements = {"verification": {"details": [{"example": "verification requirement structure"}]}}
 
-    # Generate outputs from the integration module.
+    # Generate outputs from the integration module, timing each call for the artifact store.
+    timings = {}
+    started = time.perf_counter()
     try:
         system_design_output = api_integration.generate_system_designs(prompt, examples_design, pdf_data)
     except Exception as e:
         system_design_output = f"Error generating system design: {str(e)}"
+    timings["system_design"] = time.perf_counter() - started
     
+    started = time.perf_counter()
     try:
         verification_output = api_integration.create_verification_requirements_models(prompt, examples_verif, pdf_data)
     except Exception as e:
@@ -75,12 +113,16 @@ def combined():
         if "openai.ChatCompletion" in msg:
             msg += " Please run 'openai migrate' or install openai==0.28 to pin to the old version."
         verification_output = f"Error generating verification requirements: {msg}"
+    timings["verification_requirements"] = time.perf_counter() - started
     
+    started = time.perf_counter()
     try:
         traceability_output = api_integration.get_traceability(prompt, example_system_requirements, example_system_designs)
     except Exception as e:
         traceability_output = f"Error generating traceability: {str(e)}"
+    timings["traceability"] = time.perf_counter() - started
     
+    started = time.perf_counter()
     try:
         verification_conditions_output = api_integration.get_verification_conditions(
             prompt,
@@ -90,7 +132,16 @@ def combined():
         )
     except Exception as e:
         verification_conditions_output = f"Error generating verification conditions: {str(e)}"
+    timings["verification_conditions"] = time.perf_counter() - started
     
+    # Persist the outputs off the request path, so reruns are not lost with the session.
+    artifact_store.persist_run(prompt, {
+        "system_design": system_design_output,
+        "verification_requirements": verification_output,
+        "traceability": traceability_output,
+        "verification_conditions": verification_conditions_output,
+    }, timings, source="V2_app")
+
     # Generate the system visualization based on user input and generated outputs
     try:
         # Create graph data structure with user requirements
@@ -0,0 +1,296 @@
+import csv
+import hashlib
+import io
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import db_backends
+import requirement_dedup
+import schema_introspection
+
+# Persists generated artifacts (system designs, verification requirements,
+# traceability, verification conditions) so a rerun can be looked up instead
+# of living only in the session cookie or a Tk text box.
+#
+# persist_run() only queues the run; a background writer thread splits it into
+# requirement sentences and output sections, hashes everything, and writes the
+# rows of all runs queued since the last flush in one transaction:
+#   MS SQL    multi-row INSERT ... VALUES (...), (...) statements, as many rows per
+#             round trip as the 1000-row / 2100-parameter limits allow (pypyodbc
+#             has no fast_executemany, and its executemany is one round trip per row)
+#   Postgres  COPY ... FROM STDIN (CSV)
+#   SQLite    executemany in ARTIFACT_BATCH_ROWS batches
+#
+# The results go to the configured DB_BACKEND; without one, to a local SQLite
+# file (ARTIFACT_DB_PATH). The tables are created on first write.
+ARTIFACTS_ENABLED = os.environ.get("ARTIFACTS_ENABLED", "1") == "1"
+ARTIFACT_DB_PATH = os.environ.get("ARTIFACT_DB_PATH", "artifacts.db")
+ARTIFACT_BATCH_ROWS = int(os.environ.get("ARTIFACT_BATCH_ROWS", "1000"))
+ARTIFACT_FLUSH_SECONDS = float(os.environ.get("ARTIFACT_FLUSH_SECONDS", "1"))
+ARTIFACT_QUEUE_MAX = int(os.environ.get("ARTIFACT_QUEUE_MAX", "1000"))
+HEADING_CHARS = 400
+MSSQL_MAX_VALUES_ROWS = 1000  # row constructors per INSERT ... VALUES
+MSSQL_MAX_PARAMS = 2099  # the limit is 2100 per request, and sp_executesql takes one of them
+
+# Columns per table as (name, kind); kinds map to a type per dialect below. Tables are written in this order.
+TABLES: Dict[str, List[Tuple[str, str]]] = {
+    "artifact_runs": [
+        ("run_id", "key"), ("created_at", "float"), ("source", "short"), ("prompt_hash", "hash"), ("prompt", "text"),
+    ],
+    "artifact_requirements": [
+        ("run_id", "key"), ("position", "int"), ("text_hash", "hash"), ("text", "text"),
+    ],
+    "artifact_outputs": [
+        ("run_id", "key"), ("kind", "short"), ("seconds", "float"), ("content_hash", "hash"), ("content", "text"),
+    ],
+    "artifact_sections": [
+        ("run_id", "key"), ("kind", "short"), ("position", "int"), ("heading", "short"), ("body_hash", "hash"),
+        ("body", "text"),
+    ],
+}
+PRIMARY_KEYS = {
+    "artifact_runs": ("run_id",),
+    "artifact_requirements": ("run_id", "position"),
+    "artifact_outputs": ("run_id", "kind"),
+    "artifact_sections": ("run_id", "kind", "position"),
+}
+INDEXES = {"ix_artifact_runs_prompt_hash": ("artifact_runs", "prompt_hash")}
+COLUMN_TYPES = {
+    schema_introspection.MSSQL: {
+        "key": "CHAR(32)", "hash": "CHAR(64)", "short": "NVARCHAR(400)", "text": "NVARCHAR(MAX)",
+        "int": "INT", "float": "FLOAT",
+    },
+    schema_introspection.POSTGRES: {
+        "key": "char(32)", "hash": "char(64)", "short": "varchar(400)", "text": "text",
+        "int": "integer", "float": "double precision",
+    },
+    schema_introspection.SQLITE: {
+        "key": "TEXT", "hash": "TEXT", "short": "TEXT", "text": "TEXT", "int": "INTEGER", "float": "REAL",
+    },
+}
+
+# Markdown headings, bold-only lines and "1. Title" lines start a new section.
+SECTION_HEADING = re.compile(r"^(#{1,6}\s+.+|\*\*[^*]+\*\*:?|\d+\.\s+[A-Z][^.]{2,80}:?)$")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split generated text into (heading, body) pairs; text before the first heading has heading ""."""
+    sections: List[Tuple[str, str]] = []
+    heading, lines = "", []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if SECTION_HEADING.match(stripped):
+            if heading or any(l.strip() for l in lines):
+                sections.append((heading, "\n".join(lines).strip()))
+            heading, lines = stripped.strip("#*: ").strip(), []
+        else:
+            lines.append(line)
+    if heading or any(l.strip() for l in lines):
+        sections.append((heading, "\n".join(lines).strip()))
+    return sections
+
+
+def qualified_name(dialect: str, schema_name: str, table: str) -> str:
+    """table as DDL and inserts name it: schema-qualified on MS SQL, where the login's default schema may differ."""
+    return f"{schema_name}.{table}" if dialect == schema_introspection.MSSQL else table
+
+
+def create_table_statements(dialect: str, schema_name: str) -> List[str]:
+    """DDL for the results schema; every statement is safe to rerun."""
+    types = COLUMN_TYPES[dialect]
+    mssql = dialect == schema_introspection.MSSQL
+    statements = []
+    for table, columns in TABLES.items():
+        qualified = qualified_name(dialect, schema_name, table)
+        body = ", ".join(f"{name} {types[kind]} NOT NULL" for name, kind in columns)
+        body += f", PRIMARY KEY ({', '.join(PRIMARY_KEYS[table])})"
+        if mssql:
+            statements.append(f"IF OBJECT_ID(N'{qualified}', N'U') IS NULL CREATE TABLE {qualified} ({body});")
+        else:
+            statements.append(f"CREATE TABLE IF NOT EXISTS {table} ({body});")
+    for index, (table, column) in INDEXES.items():
+        if mssql:
+            statements.append(
+                f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'{index}') "
+                f"CREATE INDEX {index} ON {qualified_name(dialect, schema_name, table)} ({column});"
+            )
+        else:
+            statements.append(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({column});")
+    return statements
+
+
+def _multi_row_insert(cursor: Any, table: str, columns: Sequence[str], rows: List[Tuple]) -> None:
+    # One INSERT ... VALUES (...), (...) per chunk; full chunks reuse the same statement text.
+    per_statement = max(min(MSSQL_MAX_VALUES_ROWS, MSSQL_MAX_PARAMS // len(columns), ARTIFACT_BATCH_ROWS), 1)
+    row_values = f"({', '.join('?' * len(columns))})"
+    for start in range(0, len(rows), per_statement):
+        chunk = rows[start:start + per_statement]
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_values] * len(chunk))};"
+        cursor.execute(query, [value for row in chunk for value in row])
+
+
+def bulk_insert(conn: Any, dialect: str, schema_name: str, table: str, columns: Sequence[str],
+                rows: List[Tuple]) -> None:
+    """Insert rows with the dialect's bulk path (COPY on Postgres, multi-row INSERTs on MS SQL, executemany on SQLite)."""
+    if not rows:
+        return
+    table = qualified_name(dialect, schema_name, table)
+    cursor = conn.cursor()
+    try:
+        if dialect == schema_introspection.POSTGRES:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            # CSV writes "" as an empty unquoted field, which COPY would read as NULL; every column is NOT NULL.
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN "
+                f"WITH (FORMAT csv, FORCE_NOT_NULL ({', '.join(columns)}))",
+                buffer,
+            )
+            return
+        if dialect == schema_introspection.MSSQL:
+            _multi_row_insert(cursor, table, columns, rows)
+            return
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))});"
+        for start in range(0, len(rows), ARTIFACT_BATCH_ROWS):
+            cursor.executemany(query, rows[start:start + ARTIFACT_BATCH_ROWS])
+    finally:
+        cursor.close()
+
+
+def run_rows(run: Dict[str, Any]) -> Dict[str, List[Tuple]]:
+    """Rows for every results table from one queued run."""
+    run_id = run["run_id"]
+    prompt = run["prompt"]
+    rows: Dict[str, List[Tuple]] = {table: [] for table in TABLES}
+    rows["artifact_runs"].append((run_id, run["created_at"], run["source"][:HEADING_CHARS], content_hash(prompt), prompt))
+    for position, sentence in enumerate(requirement_dedup.split_sentences(prompt)):
+        rows["artifact_requirements"].append((run_id, position, content_hash(sentence), sentence))
+    for kind, content in run["outputs"].items():
+        content = content or ""
+        seconds = float(run["timings"].get(kind, 0.0))
+        rows["artifact_outputs"].append((run_id, kind, seconds, content_hash(content), content))
+        for position, (heading, body) in enumerate(split_sections(content)):
+            rows["artifact_sections"].append((run_id, kind, position, heading[:HEADING_CHARS], content_hash(body), body))
+    return rows
+
+
+class ArtifactWriter:
+    """Background writer that batches queued runs into bulk inserts on backend."""
+
+    def __init__(self, backend: db_backends.DatabaseBackend, flush_seconds: float = ARTIFACT_FLUSH_SECONDS,
+                 max_queued: int = ARTIFACT_QUEUE_MAX):
+        self.backend = backend
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queued)
+        self._schema_ready = False
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, run: Dict[str, Any]) -> bool:
+        """Queue a run for writing; returns False (and drops it) when the queue is full."""
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(run)
+            return True
+        except queue.Full:
+            print(f"Artifact queue full; run {run['run_id']} was not persisted.")
+            return False
+
+    def flush(self) -> None:
+        """Block until every queued run has been written (or has failed)."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while True:  # gather whatever else arrives before the flush deadline
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"Error persisting {len(batch)} artifact run(s): {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _ensure_schema(self, conn: Any) -> None:
+        if self._schema_ready:
+            return
+        cursor = conn.cursor()
+        try:
+            for statement in create_table_statements(self.backend.dialect, self.backend.schema_name):
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+        conn.commit()
+        self._schema_ready = True
+
+    def _write(self, runs: List[Dict[str, Any]]) -> None:
+        rows: Dict[str, List[Tuple]] = {table: [] for table in TABLES}
+        for run in runs:
+            for table, table_rows in run_rows(run).items():
+                rows[table].extend(table_rows)
+        with self.backend.pool.connection() as conn:
+            self._ensure_schema(conn)
+            for table, columns in TABLES.items():
+                bulk_insert(
+                    conn, self.backend.dialect, self.backend.schema_name, table, [name for name, _ in columns], rows[table]
+                )
+            conn.commit()
+
+
+_writer: Optional[ArtifactWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> ArtifactWriter:
+    """The shared writer: the configured DB_BACKEND, or a local SQLite file at ARTIFACT_DB_PATH."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                if db_backends.DB_BACKEND:
+                    backend = db_backends.get_backend()
+                else:
+                    backend = db_backends.SQLiteBackend(db_path=ARTIFACT_DB_PATH, create=True)
+                _writer = ArtifactWriter(backend)
+    return _writer
+
+
+def persist_run(prompt: str, outputs: Dict[str, str], timings: Optional[Dict[str, float]] = None,
+                source: str = "") -> Optional[str]:
+    """
+    Queue the outputs generated for prompt (kind -> text, e.g. "system_design") with their
+    generation times in seconds. Returns the run id, or None when persistence is disabled
+    or the queue is full. Never raises, so callers can use it on the request path.
+    """
+    if not ARTIFACTS_ENABLED:
+        return None
+    try:
+        run = {
+            "run_id": uuid.uuid4().hex, "created_at": time.time(), "source": source, "prompt": prompt,
+            "outputs": dict(outputs), "timings": dict(timings or {}),
+        }
+        return run["run_id"] if get_writer().submit(run) else None
+    except Exception as e:
+        print(f"Error queueing artifacts: {e}")
+        return None
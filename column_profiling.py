@@ -0,0 +1,189 @@
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import schema_introspection
+import statement_cache
+import table_sampling
+
+# Compact column statistics for the prompt, in place of raw sample rows.
+#
+# A profile is computed set-based over a bounded sample of the table
+# (table_sampling.SamplePlan with PROFILE_SAMPLE_ROWS rows: the first rows of
+# small tables, TABLESAMPLE / random rowid probes on large ones), so it takes
+# the same time on a billion-row table as on a small one:
+#   1. stats: the catalog row estimate (the sampler's stats query)
+#   2. one aggregate query: COUNT, COUNT(DISTINCT), MIN and MAX of every column
+#   3. top values of the low-cardinality columns, all in one grouped query
+#      (GROUPING SETS on MS SQL and Postgres; one GROUP BY over the candidate
+#      columns, folded per column client-side, on SQLite)
+# Text columns arrive truncated by the sampler, so MIN/MAX and grouping never
+# touch wide values. Only types with a total order get MIN/MAX, and only
+# types with equality get distinct counts and top values.
+PROFILE_SAMPLE_ROWS = int(os.environ.get("PROFILE_SAMPLE_ROWS", "5000"))
+PROFILE_TOP_VALUES = int(os.environ.get("PROFILE_TOP_VALUES", "3"))
+PROFILE_TOP_MAX_DISTINCT = int(os.environ.get("PROFILE_TOP_MAX_DISTINCT", "50"))
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", "300"))
+PROFILE_VALUE_CHARS = 40
+
+NUMERIC_TYPES = table_sampling.INTEGER_TYPES | {
+    "decimal", "numeric", "real", "float", "double precision", "money", "smallmoney",
+}
+DATE_TYPES = {
+    "date", "time", "datetime", "datetime2", "smalldatetime", "datetimeoffset", "timestamp",
+    "timestamp without time zone", "timestamp with time zone", "time without time zone", "time with time zone",
+}
+ORDERED_TYPES = NUMERIC_TYPES | DATE_TYPES | table_sampling.TEXT_TYPES
+COMPARABLE_TYPES = ORDERED_TYPES | {"bit", "boolean", "uniqueidentifier", "uuid"}
+
+# {"rows": estimated table rows (None if unknown), "sampled": rows profiled,
+#  "columns": {name: {"type", "nulls" (ratio), "distinct", "min", "max", "top": [(value, share)]}}}
+TableProfile = Dict[str, Any]
+
+
+def _column_kind(dialect: str, data_type: str) -> Tuple[bool, bool]:
+    """(comparable, ordered) for a column type."""
+    base = table_sampling.base_type(data_type)
+    if dialect == schema_introspection.MSSQL and base in ("timestamp", "rowversion"):
+        return True, False  # MS SQL timestamp is a rowversion, not a date
+    return base in COMPARABLE_TYPES, base in ORDERED_TYPES
+
+
+class ProfilePlan:
+    """Queries for profiling one introspected table over a bounded sample."""
+
+    def __init__(self, dialect: str, schema_name: str, table_name: str,
+                 table: schema_introspection.TableSchema, sample_rows: int = PROFILE_SAMPLE_ROWS):
+        self.dialect = dialect
+        self.table = table
+        self.columns = list(table["columns"])
+        self.sampler = table_sampling.SamplePlan(
+            dialect, schema_name, table_name, table, sample_rows, method=table_sampling.TABLESAMPLE
+        )
+        self.kinds = [_column_kind(dialect, table["columns"][c]) for c in self.columns]
+        self._quoted = [table_sampling.quote_identifier(dialect, c) for c in self.columns]
+
+    def stats_query(self) -> Optional[table_sampling.Query]:
+        return self.sampler.stats_query()
+
+    def _sample(self, stats: Optional[Sequence[Any]]) -> table_sampling.Query:
+        rows = int(stats[0]) if stats and stats[0] is not None else 0
+        if rows <= self.sampler.limit:
+            # Small (or unknown) tables: the first sample_rows rows are the whole table, or a bounded read.
+            query, params = self.sampler.first_rows_query()
+        else:
+            query, params = self.sampler.sample_query(stats)
+        return query.rstrip().rstrip(";"), params
+
+    def aggregate_query(self, stats: Optional[Sequence[Any]]) -> table_sampling.Query:
+        """One row: sampled row count, then per column COUNT, COUNT(DISTINCT), MIN, MAX (NULL where not applicable)."""
+        sample, params = self._sample(stats)
+        parts = ["COUNT(*)"]
+        for quoted, (comparable, ordered) in zip(self._quoted, self.kinds):
+            parts.append(f"COUNT({quoted})")
+            parts.append(f"COUNT(DISTINCT {quoted})" if comparable else "NULL")
+            parts += [f"MIN({quoted})", f"MAX({quoted})"] if ordered else ["NULL", "NULL"]
+        return f"SELECT {', '.join(parts)} FROM ({sample}) s;", params
+
+    def top_values_query(self, stats: Optional[Sequence[Any]], columns: Sequence[int]) -> table_sampling.Query:
+        """Value counts for the given column positions; rows are (value of each column..., count)."""
+        sample, params = self._sample(stats)
+        quoted = [self._quoted[i] for i in columns]
+        if self.dialect == schema_introspection.SQLITE:
+            grouping = ", ".join(quoted)
+        else:
+            grouping = "GROUPING SETS (" + ", ".join(f"({q})" for q in quoted) + ")"
+        return f"SELECT {', '.join(quoted)}, COUNT(*) FROM ({sample}) s GROUP BY {grouping};", params
+
+    def read_aggregates(self, row: Sequence[Any], estimate: Optional[Sequence[Any]]) -> TableProfile:
+        sampled = int(row[0] or 0)
+        if estimate and estimate[0] is not None and int(estimate[0]) >= 0:
+            rows = max(int(estimate[0]), sampled)
+        else:
+            # No estimate, or Postgres 14+ reltuples = -1 for a never-analyzed table.
+            rows = sampled if sampled < self.sampler.limit else None  # a bounded read of a view or unanalyzed table
+        columns = {}
+        for i, column in enumerate(self.columns):
+            non_null, distinct, low, high = row[1 + 4 * i:5 + 4 * i]
+            columns[column] = {
+                "type": str(self.table["columns"][column]),
+                "nulls": 1 - (non_null or 0) / sampled if sampled else 0.0,
+                "distinct": distinct, "min": low, "max": high, "top": [],
+            }
+        return {"rows": rows, "sampled": sampled, "columns": columns}
+
+    def top_value_candidates(self, profile: TableProfile) -> List[int]:
+        """Columns worth listing top values for: repeated values and few distinct ones in the sample."""
+        candidates = []
+        for i, column in enumerate(self.columns):
+            stats = profile["columns"][column]
+            non_null = round((1 - stats["nulls"]) * profile["sampled"])
+            if stats["distinct"] and stats["distinct"] <= PROFILE_TOP_MAX_DISTINCT and stats["distinct"] < non_null:
+                candidates.append(i)
+        return candidates
+
+    def read_top_values(self, profile: TableProfile, columns: Sequence[int], rows: Sequence[Sequence[Any]]) -> None:
+        counts: Dict[int, Dict[Any, int]] = {i: {} for i in columns}
+        for row in rows:
+            for position, i in enumerate(columns):
+                value = row[position]
+                if value is not None:
+                    counts[i][value] = counts[i].get(value, 0) + int(row[-1])
+        for i in columns:
+            ranked = sorted(counts[i].items(), key=lambda item: -item[1])[:PROFILE_TOP_VALUES]
+            profile["columns"][self.columns[i]]["top"] = [(v, n / profile["sampled"]) for v, n in ranked]
+
+
+def profile_table(conn: Any, dialect: str, schema_name: str, table_name: str,
+                  table: Optional[schema_introspection.TableSchema],
+                  sample_rows: int = PROFILE_SAMPLE_ROWS) -> TableProfile:
+    """Profile table_name over an open DB-API connection; {} for tables missing from the schema snapshot."""
+    if table is None:
+        return {}
+    plan = ProfilePlan(dialect, schema_name, table_name, table, sample_rows)
+    stats = None
+    stats_query = plan.stats_query()
+    if stats_query:
+        try:
+            stats = statement_cache.execute(conn, *stats_query).fetchone()
+        except Exception as e:
+            print(f"Error estimating the size of table '{table_name}': {e}")
+            conn.rollback()
+    profile = plan.read_aggregates(statement_cache.execute(conn, *plan.aggregate_query(stats)).fetchone(), stats)
+    candidates = plan.top_value_candidates(profile)
+    if candidates:
+        rows = statement_cache.execute(conn, *plan.top_values_query(stats, candidates)).fetchall()
+        plan.read_top_values(profile, candidates, rows)
+    return profile
+
+
+def _show(value: Any) -> str:
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    text = repr(value) if isinstance(value, str) else str(value)
+    return text if len(text) <= PROFILE_VALUE_CHARS else text[:PROFILE_VALUE_CHARS - 3] + "..."
+
+
+def describe_profile(table_name: str, profile: TableProfile) -> str:
+    """Render a profile as a few compact lines for the prompt."""
+    if not profile or not profile["sampled"]:
+        return f"No data found for table '{table_name}'."
+    sampled = profile["sampled"]
+    if profile["rows"] is None:
+        scope = f"first {sampled} rows"
+    else:
+        scope = f"~{profile['rows']} rows" + (f", {sampled} sampled" if profile["rows"] > sampled else "")
+    partial = profile["rows"] is None or profile["rows"] > sampled
+    in_sample = " in sample" if partial else ""  # distinct counts of a sample say little about the table
+    lines = [f"Column statistics for '{table_name}' ({scope}):"]
+    for column, stats in profile["columns"].items():
+        parts = [f"{stats['nulls']:.0%} null"]
+        if stats["distinct"] is not None:
+            non_null = round((1 - stats["nulls"]) * sampled)
+            unique = non_null and stats["distinct"] == non_null
+            parts.append(("unique" if unique else f"{stats['distinct']} distinct") + in_sample)
+        if stats["min"] is not None:
+            parts.append(f"{_show(stats['min'])} to {_show(stats['max'])}")
+        if stats["top"]:
+            parts.append("top " + ", ".join(f"{_show(v)} {share:.0%}" for v, share in stats["top"]))
+        lines.append(f"  {column} {stats['type']}: {', '.join(parts)}")
+    return "\n".join(lines)
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import pdf_retrieval
+import requirement_dedup
+
+# Reference corpus produced offline by ingest_corpus.py: documents, their pages
+# and section-aware chunks in one SQLite database with an FTS5 index over the
+# chunks, plus a manifest of file size/mtime/hash used for incremental refreshes.
+# The Flask apps open it lazily (read-only, one connection per thread).
+CORPUS_DB_PATH = os.environ.get("CORPUS_DB_PATH", "reference_corpus.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (document_id, page)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    page INTEGER NOT NULL,
+    section TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_document ON chunks(document_id);
+CREATE TABLE IF NOT EXISTS manifest (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+    section, text, content='chunks', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts(rowid, section, text) VALUES (new.id, new.section, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts(chunks_fts, rowid, section, text) VALUES ('delete', old.id, old.section, old.text);
+END;
+"""
+
+_local = threading.local()
+
+
+def open_corpus_for_writing(db_path: str = CORPUS_DB_PATH) -> sqlite3.Connection:
+    """Open (creating if needed) the corpus database for ingestion."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def corpus_available(db_path: str = CORPUS_DB_PATH) -> bool:
+    """True when an ingested corpus exists; does not open the database."""
+    return os.path.isfile(db_path)
+
+
+def get_corpus_connection(db_path: str = CORPUS_DB_PATH) -> Optional[sqlite3.Connection]:
+    """Return this thread's read-only connection to the corpus, opening it on first use."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    if db_path not in connections:
+        if not corpus_available(db_path):
+            return None
+        try:
+            connections[db_path] = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        except sqlite3.Error as e:
+            print(f"Error opening reference corpus: {e}")
+            return None
+    return connections[db_path]
+
+
+def _match_expression(query: str) -> str:
+    """Turn free text into an FTS5 OR-query of quoted terms."""
+    terms = dict.fromkeys(pdf_retrieval.tokenize(query))
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def search_corpus(query: str, limit: int = pdf_retrieval.TOP_K,
+                  db_path: str = CORPUS_DB_PATH) -> List[Dict[str, Any]]:
+    """Return the chunks ranked most relevant to query by FTS5's bm25(), best first."""
+    conn = get_corpus_connection(db_path)
+    expression = _match_expression(query)
+    if conn is None or not expression:
+        return []
+    try:
+        rows = conn.execute(
+            """
+            SELECT d.name, c.page, c.section, c.text
+            FROM chunks_fts
+            JOIN chunks c ON c.id = chunks_fts.rowid
+            JOIN documents d ON d.id = c.document_id
+            WHERE chunks_fts MATCH ?
+            ORDER BY bm25(chunks_fts)
+            LIMIT ?;
+            """,
+            (expression, limit),
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error searching reference corpus: {e}")
+        return []
+    return [{"document": row[0], "page": row[1], "section": row[2], "text": row[3]} for row in rows]
+
+
+def build_corpus_context(query: str, token_budget: Optional[int] = None, top_k: Optional[int] = None,
+                         db_path: str = CORPUS_DB_PATH) -> str:
+    """Return the corpus excerpts most relevant to query, bounded by token_budget."""
+    token_budget = pdf_retrieval.TOKEN_BUDGET if token_budget is None else token_budget
+    top_k = pdf_retrieval.TOP_K if top_k is None else top_k
+    chunks = search_corpus(query, top_k, db_path)
+    # The same requirement often appears in several revisions of a document; keep the best ranked copy.
+    chunks = [chunks[i] for i in requirement_dedup.unique_indices([c["text"] for c in chunks])]
+    selected, used = [], 0
+    for chunk in chunks:
+        cost = pdf_retrieval.estimate_tokens(chunk["text"])
+        if used + cost > token_budget:
+            continue
+        selected.append(chunk)
+        used += cost
+    return pdf_retrieval.format_chunks(selected)
@@ -0,0 +1,136 @@
+import asyncio
+import functools
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Dict, Iterable, List, Optional, Tuple
+
+import db_pool
+import schema_cache
+import schema_introspection
+import statement_cache
+import table_sampling
+from statement_cache import numbered_placeholders
+
+# Async DB access for the integration modules, so a request handler can
+# overlap DB work with PDF/NLP processing and LLM calls.
+#
+# ODBC has no async driver, so run_blocking() moves the existing blocking
+# functions onto a dedicated thread pool (sized like the connection pool)
+# instead of the event loop or the web server's worker threads.
+#
+# PostgreSQL goes through asyncpg. Its connection pool belongs to one event
+# loop, but Flask starts a new loop for every async view. So the pool lives on
+# a long-running background loop, and callers on any loop await work scheduled
+# there. Connections then outlive a single request.
+DB_ASYNC_WORKERS = int(os.environ.get("DB_ASYNC_WORKERS", str(db_pool.POOL_MAX_SIZE)))
+
+_executor = ThreadPoolExecutor(max_workers=DB_ASYNC_WORKERS, thread_name_prefix="db-async")
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Await a blocking DB call (e.g. a pypyodbc helper) on the DB thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+def map_blocking(func: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+    """Run func over items concurrently on the DB thread pool (for sync callers; not from a DB worker)."""
+    return list(_executor.map(func, items))
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="db-async-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+async def _on_background_loop(coro: Coroutine) -> Any:
+    future = asyncio.run_coroutine_threadsafe(coro, _background_loop())
+    return await asyncio.wrap_future(future)
+
+
+class AsyncPostgres:
+    """asyncpg-backed counterparts of the Postgres integration queries for one schema."""
+
+    def __init__(self, connect_params: Dict[str, Any], schema_name: str = "public"):
+        self.connect_params = connect_params
+        self.schema_name = schema_name
+        self._pool: Any = None
+
+    async def _get_pool(self) -> Any:
+        # Only ever runs on the background loop, so no lock is needed.
+        if self._pool is None:
+            import asyncpg  # pip install asyncpg
+
+            self._pool = await asyncpg.create_pool(
+                min_size=db_pool.POOL_MIN_SIZE,
+                max_size=db_pool.POOL_MAX_SIZE,
+                max_inactive_connection_lifetime=db_pool.POOL_IDLE_SECONDS,
+                timeout=db_pool.POOL_CHECKOUT_TIMEOUT,
+                statement_cache_size=statement_cache.STATEMENT_CACHE_SIZE,  # prepared statements per connection
+                **self.connect_params,
+            )
+        return self._pool
+
+    async def _fetch_rows(self, query: str, *args: Any) -> List[Tuple]:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            return [tuple(record) for record in await conn.fetch(query, *args)]
+
+    async def fetch(self, query: str, *args: Any) -> List[Tuple]:
+        """Run query (asyncpg $n placeholders) on the shared pool; rows come back as tuples."""
+        return await _on_background_loop(self._fetch_rows(query, *args))
+
+    async def list_tables(self) -> List[str]:
+        rows = await self.fetch(
+            "SELECT table_name FROM information_schema.tables WHERE table_schema = $1;", self.schema_name
+        )
+        return [row[0] for row in rows]
+
+    async def introspect(self) -> Dict[str, schema_introspection.TableSchema]:
+        query = numbered_placeholders(schema_introspection.SCHEMA_QUERIES[schema_introspection.POSTGRES])
+        return schema_introspection.group_schema_rows(await self.fetch(query, self.schema_name))
+
+    async def schema_version(self) -> Any:
+        rows = await self.fetch(schema_cache.VERSION_QUERIES[schema_introspection.POSTGRES])
+        return rows[0] if rows else None
+
+    async def _fetch_streamed(self, conn: Any, query: Tuple[str, Tuple], limit: int) -> List[Tuple]:
+        # asyncpg cursors are server-side and need a transaction.
+        rows: List[Tuple] = []
+        async with conn.transaction():
+            cursor = await conn.cursor(numbered_placeholders(query[0]), *query[1])
+            while len(rows) < limit:
+                batch = await cursor.fetch(min(table_sampling.SAMPLE_FETCH_BATCH, limit - len(rows)))
+                if not batch:
+                    break
+                rows.extend(tuple(record) for record in batch)
+        return rows
+
+    async def _sample_rows(self, plan: table_sampling.SamplePlan) -> List[Tuple]:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            stats = None
+            stats_query = plan.stats_query()
+            if stats_query:
+                stats = await conn.fetchrow(numbered_placeholders(stats_query[0]), *stats_query[1])
+            rows = await self._fetch_streamed(conn, plan.sample_query(stats), plan.limit)
+            if plan.needs_fallback(rows):
+                rows = await self._fetch_streamed(conn, plan.first_rows_query(), plan.limit)
+        return plan.finish(rows)
+
+    async def sample_table(self, table_name: str, table: Optional[schema_introspection.TableSchema],
+                           limit: int) -> List[Tuple]:
+        """Async table_sampling.sample_table; table is the introspected entry, if known."""
+        if not re.match(r'^\w+$', table_name):
+            raise ValueError("Invalid table name format.")
+        plan = table_sampling.SamplePlan(schema_introspection.POSTGRES, self.schema_name, table_name, table, limit)
+        return await _on_background_loop(self._sample_rows(plan))
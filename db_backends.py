@@ -0,0 +1,348 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import column_profiling
+import db_async
+import db_pool
+import sample_cache
+import schema_cache
+import schema_introspection
+import schema_selection
+import statement_cache
+import table_detection
+import table_sampling
+
+# One implementation of the DB helpers (list_all_tables, fetch_table_structure,
+# fetch_specific_table, profile_table and their async counterparts) behind a
+# backend interface, so pooling, schema and sample caching and sampling apply
+# the same way to every integration module.
+#
+# DB_BACKEND picks the backend: "mssql" (ODBC), "postgres" (psycopg2, with
+# asyncpg for the async path) or "sqlite". A module that does not set it gets
+# the driver it was written for. The SQLite backend is a local stand-in for
+# offline runs and benchmarks; see make_benchmark_db.py for a generated
+# large schema. Drivers are imported on first connection, so only the
+# configured backend's driver needs to be installed.
+DB_BACKEND = os.environ.get("DB_BACKEND", "")
+
+# Connection settings shared by the networked backends.
+DB_SERVER = os.environ.get("DB_SERVER", "X")
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_PORT = int(os.environ.get("DB_PORT", "5432"))
+DB_NAME = os.environ.get("DB_NAME", "X")
+DB_USER = os.environ.get("DB_USER", "X")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "X")
+SQLITE_DB_PATH = os.environ.get("SQLITE_DB_PATH", "benchmark_schema.db")
+
+_backends: Dict[str, "DatabaseBackend"] = {}
+_backends_lock = threading.Lock()
+
+
+class DatabaseBackend:
+    """Pooled, schema-cached DB access for one driver; subclasses supply connect() and the table list query."""
+
+    name = ""
+    dialect = ""
+    default_schema = ""
+    table_list_query = ""
+
+    def __init__(self, schema_name: Optional[str] = None):
+        self.schema_name = schema_name or self.default_schema
+        self.pool = db_pool.ConnectionPool(self._connect_cached)
+        self._schema_cache = schema_cache.SchemaCache(self._load_schema, self._schema_version)
+        self._sample_cache = sample_cache.SampleCache()
+        self._profile_cache = sample_cache.SampleCache(ttl=column_profiling.PROFILE_CACHE_TTL)
+
+    def connect(self) -> Any:
+        """Open a new DB-API connection (returns None on failure)."""
+        raise NotImplementedError
+
+    def _connect_cached(self) -> Any:
+        # Pooled connections keep their prepared statements for as long as they live.
+        conn = self.connect()
+        return statement_cache.CachedConnection(conn, self.dialect) if conn is not None else None
+
+    def _load_schema(self) -> Dict[str, schema_introspection.TableSchema]:
+        try:
+            with self.pool.connection() as conn:
+                query = schema_introspection.SCHEMA_QUERIES[self.dialect]
+                return schema_introspection.group_schema_rows(conn.execute(query, (self.schema_name,)).fetchall())
+        except Exception as e:
+            print(f"Error fetching table structures: {e}")
+            return {}
+
+    def _schema_version(self) -> Any:
+        with self.pool.connection() as conn:
+            row = conn.execute(*schema_cache.version_query(self.dialect, self.schema_name)).fetchone()
+            return tuple(row) if row else None
+
+    def _table_version(self, name: str, table: schema_introspection.TableSchema) -> Any:
+        query = sample_cache.table_version_query(self.dialect, self.schema_name, name, table)
+        if query is None:
+            return None
+        with self.pool.connection() as conn:
+            row = conn.execute(*query).fetchone()
+            return tuple(row) if row else None
+
+    def _sample(self, name: str, table: Optional[schema_introspection.TableSchema], limit: int) -> List[Any]:
+        with self.pool.connection() as conn:
+            return table_sampling.sample_table(conn, self.dialect, self.schema_name, name, table, limit)
+
+    def _profile(self, name: str, table: Optional[schema_introspection.TableSchema]) -> column_profiling.TableProfile:
+        with self.pool.connection() as conn:
+            return column_profiling.profile_table(conn, self.dialect, self.schema_name, name, table)
+
+    def _report_tables(self, tables: List[str]) -> List[str]:
+        if tables:
+            print(f"Tables have been retrieved successfully: {tables}")
+        else:
+            print(f"No tables found in the '{self.schema_name}' schema.")
+        return tables
+
+    def list_all_tables(self) -> List[str]:
+        """Retrieve a list of all tables in the backend's schema."""
+        try:
+            with self.pool.connection() as conn:
+                tables = [row[0] for row in conn.execute(self.table_list_query, (self.schema_name,)).fetchall()]
+            return self._report_tables(tables)
+        except Exception as e:
+            print(f"Error fetching table list: {e}")
+            return []
+
+    def get_schema(self) -> Dict[str, schema_introspection.TableSchema]:
+        """The introspected schema (columns, primary and foreign keys per table), from the schema cache."""
+        return self._schema_cache.get()
+
+    def fetch_table_structure(self) -> Dict[str, Dict[str, str]]:
+        """{table: {column: type}} for every table, with key columns marked."""
+        return schema_introspection.describe_columns(self.get_schema())
+
+    def fetch_relevant_table_structure(self, query: str, required_tables: Iterable[str] = ()) -> str:
+        """Compact structure of the tables most relevant to query, within a fixed token budget (see schema_selection)."""
+        return schema_selection.build_schema_context(self.get_schema(), query, required_tables)
+
+    def invalidate_table_structure(self) -> None:
+        """Drop the cached schema so the next call re-introspects."""
+        self._schema_cache.invalidate()
+
+    def fetch_specific_table(self, table_name: str, limit: int = 5) -> List[Any]:
+        """A representative sample of up to limit rows from table_name (see table_sampling), cached until the table changes."""
+        try:
+            if not re.match(r'^\w+$', table_name):
+                raise ValueError("Invalid table name format.")
+            name, table = table_sampling.find_table(self.get_schema(), table_name)
+            return self._sample_cache.get(
+                sample_cache.sample_key(name, limit), table,
+                lambda: self._table_version(name, table), lambda: self._sample(name, table, limit),
+            )
+        except Exception as e:
+            print(f"Error fetching data from table '{table_name}': {e}")
+            return []
+
+    def profile_table(self, table_name: str) -> column_profiling.TableProfile:
+        """Column statistics of table_name over a bounded sample (see column_profiling), cached until the table changes."""
+        try:
+            if not re.match(r'^\w+$', table_name):
+                raise ValueError("Invalid table name format.")
+            name, table = table_sampling.find_table(self.get_schema(), table_name)
+            return self._profile_cache.get(
+                (name, "profile", column_profiling.PROFILE_SAMPLE_ROWS), table,
+                lambda: self._table_version(name, table), lambda: self._profile(name, table),
+            )
+        except Exception as e:
+            print(f"Error profiling table '{table_name}': {e}")
+            return {}
+
+    def profile_tables(self, table_names: Iterable[str]) -> Dict[str, column_profiling.TableProfile]:
+        """profile_table for each name, run concurrently on pooled connections."""
+        names = list(dict.fromkeys(table_names))
+        return dict(zip(names, db_async.map_blocking(self.profile_table, names)))
+
+    def invalidate_table_samples(self, table_name: Optional[str] = None) -> None:
+        """Drop the cached samples and profiles of table_name, or of every table."""
+        self._sample_cache.invalidate(table_name)
+        self._profile_cache.invalidate(table_name)
+
+    def detect_tables(self, text: str, limit: int = table_detection.TABLE_DETECT_MAX) -> List[str]:
+        """Real tables mentioned in text (see table_detection); "table <name>" mentions as typed if the schema is unknown."""
+        schema = self.get_schema()
+        if not schema:
+            return table_detection.explicit_mentions(text)[:limit]
+        return table_detection.detect_tables(schema, text, limit)
+
+    def fetch_specific_tables(self, table_names: Iterable[str], limit: int = 5) -> Dict[str, List[Any]]:
+        """fetch_specific_table for each name, run concurrently on pooled connections."""
+        names = list(dict.fromkeys(table_names))
+        rows = db_async.map_blocking(lambda name: self.fetch_specific_table(name, limit), names)
+        return dict(zip(names, rows))
+
+    # Async counterparts: blocking drivers run on the DB thread pool.
+    async def list_all_tables_async(self) -> List[str]:
+        return await db_async.run_blocking(self.list_all_tables)
+
+    async def fetch_table_structure_async(self) -> Dict[str, Dict[str, str]]:
+        return await db_async.run_blocking(self.fetch_table_structure)
+
+    async def fetch_relevant_table_structure_async(self, query: str, required_tables: Iterable[str] = ()) -> str:
+        return await db_async.run_blocking(self.fetch_relevant_table_structure, query, required_tables)
+
+    async def fetch_specific_tables_async(self, table_names: Iterable[str], limit: int = 5) -> Dict[str, List[Any]]:
+        names = list(dict.fromkeys(table_names))
+        rows = await asyncio.gather(*(self.fetch_specific_table_async(name, limit) for name in names))
+        return dict(zip(names, rows))
+
+    async def fetch_specific_table_async(self, table_name: str, limit: int = 5) -> List[Any]:
+        return await db_async.run_blocking(self.fetch_specific_table, table_name, limit)
+
+    async def profile_tables_async(self, table_names: Iterable[str]) -> Dict[str, column_profiling.TableProfile]:
+        names = list(dict.fromkeys(table_names))
+        profiles = await asyncio.gather(*(db_async.run_blocking(self.profile_table, name) for name in names))
+        return dict(zip(names, profiles))
+
+
+class MSSQLBackend(DatabaseBackend):
+    """SQL Server over ODBC (pypyodbc)."""
+
+    name = "mssql"
+    dialect = schema_introspection.MSSQL
+    default_schema = "dbo"
+    table_list_query = "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = ?;"
+
+    def connect(self) -> Any:
+        """Establish a connection to the MS SQL Server database using ODBC with environment variables."""
+        try:
+            import pypyodbc as odbc  # pip install pypyodbc
+
+            return odbc.connect(
+                "Driver={ODBC Driver 18 for SQL Server};"
+                f"Server={DB_SERVER};"
+                f"Database={DB_NAME};"
+                f"Uid={DB_USER};"
+                f"Pwd={DB_PASSWORD};"
+                "TrustServerCertificate=yes;"
+                "Connection Timeout=300;"
+            )
+        except Exception as e:
+            print(f"Database connection error: {e}")
+            return None
+
+
+class PostgresBackend(DatabaseBackend):
+    """PostgreSQL over psycopg2, with asyncpg for the async counterparts."""
+
+    name = "postgres"
+    dialect = schema_introspection.POSTGRES
+    default_schema = "public"
+    table_list_query = "SELECT table_name FROM information_schema.tables WHERE table_schema = %s;"
+
+    def __init__(self, schema_name: Optional[str] = None):
+        super().__init__(schema_name)
+        self.connect_params = {
+            "database": DB_NAME, "user": DB_USER, "password": DB_PASSWORD,
+            "host": DB_HOST, "port": DB_PORT,
+        }
+        self._async_db = db_async.AsyncPostgres(self.connect_params, self.schema_name)
+
+    def connect(self) -> Any:
+        """Establish a connection to the PostgreSQL database."""
+        try:
+            import psycopg2  # pip install psycopg2
+
+            return psycopg2.connect(**self.connect_params)
+        except Exception as e:
+            print(f"Database connection error: {e}")
+            return None
+
+    async def _load_schema_async(self) -> Dict[str, schema_introspection.TableSchema]:
+        try:
+            return await self._async_db.introspect()
+        except Exception as e:
+            print(f"Error fetching table structures: {e}")
+            return {}
+
+    async def _get_schema_async(self) -> Dict[str, schema_introspection.TableSchema]:
+        return await self._schema_cache.get_async(self._load_schema_async, self._async_db.schema_version)
+
+    async def _table_version_async(self, name: str, table: schema_introspection.TableSchema) -> Any:
+        query, params = sample_cache.table_version_query(self.dialect, self.schema_name, name, table)
+        rows = await self._async_db.fetch(statement_cache.numbered_placeholders(query), *params)
+        return rows[0] if rows else None
+
+    async def list_all_tables_async(self) -> List[str]:
+        try:
+            return self._report_tables(await self._async_db.list_tables())
+        except Exception as e:
+            print(f"Error fetching table list: {e}")
+            return []
+
+    async def fetch_table_structure_async(self) -> Dict[str, Dict[str, str]]:
+        return schema_introspection.describe_columns(await self._get_schema_async())
+
+    async def fetch_relevant_table_structure_async(self, query: str, required_tables: Iterable[str] = ()) -> str:
+        return schema_selection.build_schema_context(await self._get_schema_async(), query, required_tables)
+
+    async def fetch_specific_table_async(self, table_name: str, limit: int = 5) -> List[Any]:
+        try:
+            name, table = table_sampling.find_table(await self._get_schema_async(), table_name)
+            return await self._sample_cache.get_async(
+                sample_cache.sample_key(name, limit), table,
+                lambda: self._table_version_async(name, table), lambda: self._async_db.sample_table(name, table, limit),
+            )
+        except Exception as e:
+            print(f"Error fetching data from table '{table_name}': {e}")
+            return []
+
+
+class SQLiteBackend(DatabaseBackend):
+    """Local SQLite database (SQLITE_DB_PATH) standing in for the server backends."""
+
+    name = "sqlite"
+    dialect = schema_introspection.SQLITE
+    default_schema = "main"
+    table_list_query = "SELECT name FROM pragma_table_list WHERE schema = ? AND type = 'table' AND name NOT LIKE 'sqlite_%';"
+
+    def __init__(self, schema_name: Optional[str] = None, db_path: Optional[str] = None, create: bool = False):
+        self.db_path = db_path or SQLITE_DB_PATH
+        self.create = create
+        super().__init__(schema_name)
+
+    def _table_version(self, name: str, table: schema_introspection.TableSchema) -> Any:
+        # SQLite keeps no per-table counters; any write changes the file (or its WAL).
+        version = []
+        for path in (self.db_path, self.db_path + "-wal"):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                version += [stat.st_mtime_ns, stat.st_size]
+        return tuple(version) or None
+
+    def connect(self) -> Any:
+        """Open the SQLite file (created only if create is set); connections move between pool threads."""
+        try:
+            if not self.create and not os.path.exists(self.db_path):
+                raise FileNotFoundError(f"SQLite database '{self.db_path}' does not exist.")
+            return sqlite3.connect(self.db_path, check_same_thread=False,
+                                   cached_statements=statement_cache.STATEMENT_CACHE_SIZE)
+        except Exception as e:
+            print(f"Database connection error: {e}")
+            return None
+
+
+BACKENDS = {backend.name: backend for backend in (MSSQLBackend, PostgresBackend, SQLiteBackend)}
+
+
+def get_backend(default: str = MSSQLBackend.name) -> DatabaseBackend:
+    """Return the shared backend named by DB_BACKEND (or default), creating it on first use."""
+    name = (DB_BACKEND or default).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown DB_BACKEND '{name}'; expected one of {sorted(BACKENDS)}.")
+    backend = _backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = _backends[name] = BACKENDS[name]()
+    return backend
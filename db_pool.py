@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Iterator, Optional, Tuple
+
+# Thread-safe pool of DB-API connections (pypyodbc, pyodbc, psycopg2, sqlite3).
+# Opening a connection costs a TLS and login handshake, so connections are
+# leased per operation and returned instead of being closed:
+#
+#     with pool.connection() as conn:
+#         cursor = conn.cursor()
+#         ...
+#
+# A connection that sat idle longer than POOL_CHECK_AFTER is probed with a
+# cheap query before it is handed out. Connections idle past POOL_IDLE_SECONDS
+# are closed, but the pool never drops below POOL_MIN_SIZE.
+POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX", "8"))
+POOL_IDLE_SECONDS = float(os.environ.get("DB_POOL_IDLE_SECONDS", "300"))
+POOL_CHECKOUT_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+POOL_CHECK_AFTER = float(os.environ.get("DB_POOL_CHECK_AFTER", "5"))
+
+
+class PoolError(Exception):
+    """Raised when the pool cannot open a connection."""
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection becomes free within the checkout timeout."""
+
+
+def _close_quietly(conn: Any) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool around connect, a callable that opens a new connection
+    (returning None or raising on failure, as the connect_to_db helpers do).
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_size: int = POOL_MIN_SIZE,
+                 max_size: int = POOL_MAX_SIZE, idle_seconds: float = POOL_IDLE_SECONDS,
+                 checkout_timeout: float = POOL_CHECKOUT_TIMEOUT, check_after: float = POOL_CHECK_AFTER,
+                 health_query: str = "SELECT 1"):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.")
+        self._connect = connect
+        self.min_size = max(min_size, 0)
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self.checkout_timeout = checkout_timeout
+        self.check_after = check_after
+        self.health_query = health_query
+        # Idle connections with the time they were returned; the most recent is on the right.
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._size = 0  # idle plus leased connections
+        self._cond = threading.Condition()
+
+    def _open(self) -> Any:
+        try:
+            conn = self._connect()
+        except Exception as e:
+            raise PoolError(f"Could not open a database connection: {e}") from e
+        if conn is None:
+            raise PoolError("Could not open a database connection.")
+        return conn
+
+    def _is_healthy(self, conn: Any) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.health_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self, now: float) -> list:
+        # Oldest idle connections sit on the left of the deque.
+        expired = []
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_seconds:
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+        return expired
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """Check out a healthy connection, opening one if the pool is below max_size."""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                expired = self._evict_idle_locked(time.monotonic())
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        for conn in expired:
+                            _close_quietly(conn)
+                        raise PoolTimeout(f"No database connection free after {timeout:g}s.")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                else:
+                    conn, returned_at = None, 0.0
+                    self._size += 1  # reserve the slot before connecting outside the lock
+            for stale in expired:
+                _close_quietly(stale)
+
+            if conn is None:
+                try:
+                    return self._open()
+                except Exception:
+                    self._discard_slot()
+                    raise
+            if time.monotonic() - returned_at <= self.check_after or self._is_healthy(conn):
+                return conn
+            _close_quietly(conn)
+            self._discard_slot()
+
+    def _discard_slot(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def release(self, conn: Any, discard: bool = False) -> None:
+        """Return a leased connection; it is rolled back first and closed instead if that fails or discard is set."""
+        if not discard:
+            try:
+                conn.rollback()  # end any transaction the caller left open
+            except Exception:
+                discard = True
+        if discard:
+            _close_quietly(conn)
+            self._discard_slot()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Lease a connection for the duration of a with block."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def warm(self) -> None:
+        """Open connections until min_size are available (e.g. at server startup)."""
+        leased = []
+        try:
+            for _ in range(max(self.min_size - self.size(), 0)):
+                leased.append(self.acquire())
+        except Exception as e:
+            print(f"Error warming database pool: {e}")
+        finally:
+            for conn in leased:
+                self.release(conn)
+
+    def size(self) -> int:
+        """Number of open connections, idle or leased."""
+        with self._cond:
+            return self._size
+
+    def close_all(self) -> None:
+        """Close every idle connection (e.g. at shutdown); leased connections are unaffected."""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            _close_quietly(conn)
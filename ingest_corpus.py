@@ -0,0 +1,134 @@
+import argparse
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, List
+
+import corpus_store
+import pdf_extraction
+import pdf_retrieval
+from pdf_source import PdfSource
+
+# Offline ingestion of a directory of reference PDFs into the SQLite FTS5 store
+# read by corpus_store.py, so the Flask apps never parse PDFs at startup.
+# Refreshes are incremental: files whose size and mtime match the manifest are
+# skipped, touched-but-identical files only update the manifest, and documents
+# whose files disappeared are deleted. --full re-extracts everything.
+#
+#   python ingest_corpus.py path/to/pdfs --db reference_corpus.db [--full]
+
+
+def find_pdfs(directory: str) -> List[str]:
+    """Return the absolute paths of all PDFs under directory, sorted."""
+    found = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(".pdf"):
+                found.append(os.path.abspath(os.path.join(root, name)))
+    return sorted(found)
+
+
+def _record_manifest(conn: sqlite3.Connection, path: str, stat: os.stat_result, digest: str) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO manifest (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?);",
+        (path, stat.st_size, stat.st_mtime_ns, digest),
+    )
+
+
+def remove_document(conn: sqlite3.Connection, path: str) -> None:
+    """Delete a document, its pages and chunks (FTS rows follow via trigger) and its manifest entry."""
+    with conn:
+        conn.execute("DELETE FROM documents WHERE path = ?;", (path,))
+        conn.execute("DELETE FROM manifest WHERE path = ?;", (path,))
+
+
+def ingest_document(conn: sqlite3.Connection, source: PdfSource, stat: os.stat_result) -> int:
+    """
+    (Re)load one PDF: its pages, chunks and manifest entry replace any earlier copy in a single transaction.
+    Pages stream from the extractor straight into the pages table and the chunker.
+    Returns the number of chunks written.
+    """
+    path = source.path
+    with conn:
+        conn.execute("DELETE FROM documents WHERE path = ?;", (path,))
+        document_id = conn.execute(
+            "INSERT INTO documents (path, name, digest, page_count, ingested_at) VALUES (?, ?, ?, 0, ?);",
+            (path, os.path.basename(path), source.digest, time.time()),
+        ).lastrowid
+
+        def stored_pages() -> Iterator[str]:
+            page_count = 0
+            for page_count, page_text in enumerate(pdf_extraction.iter_pdf_pages(source.open_view()), start=1):
+                conn.execute(
+                    "INSERT INTO pages (document_id, page, text) VALUES (?, ?, ?);",
+                    (document_id, page_count, page_text),
+                )
+                yield page_text
+            conn.execute("UPDATE documents SET page_count = ? WHERE id = ?;", (page_count, document_id))
+
+        chunks = pdf_retrieval.chunk_pages(stored_pages())
+        conn.executemany(
+            "INSERT INTO chunks (document_id, page, section, text) VALUES (?, ?, ?, ?);",
+            [(document_id, c["page"], c["section"], c["text"]) for c in chunks],
+        )
+        _record_manifest(conn, path, stat, source.digest)
+    return len(chunks)
+
+
+def ingest_directory(directory: str, db_path: str = corpus_store.CORPUS_DB_PATH, full: bool = False) -> Dict[str, int]:
+    """
+    Bring the corpus database in line with the PDFs under directory.
+    Only new or changed files are extracted; returns counts per outcome.
+    """
+    counts = {"added": 0, "changed": 0, "touched": 0, "unchanged": 0, "removed": 0, "failed": 0}
+    root = os.path.join(os.path.abspath(directory), "")
+    conn = corpus_store.open_corpus_for_writing(db_path)
+    try:
+        manifest = {
+            row[0]: (row[1], row[2], row[3])
+            for row in conn.execute("SELECT path, size, mtime_ns, digest FROM manifest;")
+            if row[0].startswith(root)
+        }
+        paths = find_pdfs(directory)
+        for path in set(manifest) - set(paths):
+            remove_document(conn, path)
+            counts["removed"] += 1
+            print(f"Removed {path}")
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                known = manifest.get(path)
+                if not full and known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+                    counts["unchanged"] += 1
+                    continue
+                started = time.perf_counter()
+                with PdfSource(path) as source:
+                    if not full and known and known[2] == source.digest:
+                        with conn:
+                            _record_manifest(conn, path, stat, source.digest)
+                        counts["touched"] += 1
+                        continue
+                    chunk_count = ingest_document(conn, source, stat)
+                counts["changed" if known else "added"] += 1
+                print(f"Ingested {path}: {chunk_count} chunks in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"Error ingesting {path}: {e}")
+        # A full merge of the FTS b-trees costs time proportional to the whole corpus,
+        # so incremental refreshes leave segment merging to FTS5's automerge.
+        if full:
+            with conn:
+                conn.execute("INSERT INTO chunks_fts(chunks_fts) VALUES ('optimize');")
+    finally:
+        conn.close()
+    print(", ".join(f"{outcome}: {count}" for outcome, count in counts.items()))
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the reference corpus database from a directory of PDFs.")
+    parser.add_argument("directory", help="Directory containing reference PDFs (searched recursively).")
+    parser.add_argument("--db", default=corpus_store.CORPUS_DB_PATH, help="Path of the SQLite corpus database.")
+    parser.add_argument("--full", action="store_true", help="Re-extract every document, ignoring the manifest.")
+    args = parser.parse_args()
+    ingest_directory(args.directory, args.db, args.full)
@@ -0,0 +1,103 @@
+import argparse
+import os
+import random
+import sqlite3
+import time
+from typing import Dict, List
+
+import db_backends
+
+# Generates a large SQLite schema for running the pipeline and its DB benchmarks
+# offline through db_backends.SQLiteBackend (DB_BACKEND=sqlite). Every table
+# has an integer primary key, a mix of text, real and blob columns and up to
+# two foreign keys to earlier tables; names look like requirement-model tables
+# ("system_requirements_17") so table detection has something to match.
+#
+#   python make_benchmark_db.py --db benchmark_schema.db [--tables 1500] [--rows 200] [--bench]
+
+TABLE_STEMS = [
+    "system_requirements", "verification_conditions", "test_cases", "components", "interfaces",
+    "subsystems", "hazards", "mission_phases", "sensors", "actuators", "power_budgets",
+    "trade_studies", "traceability_links", "design_reviews", "anomalies", "suppliers",
+]
+COLUMN_TYPES = ["TEXT", "INTEGER", "REAL", "VARCHAR(64)", "BLOB"]
+WORDS = ["shall", "provide", "monitor", "thermal", "margin", "telemetry", "redundant", "latency",
+         "mass", "power", "orbit", "ground", "link", "fault", "safe", "mode", "verify", "analysis"]
+
+
+def _value(rng: random.Random, column_type: str) -> object:
+    if column_type == "INTEGER":
+        return rng.randint(0, 10 ** 6)
+    if column_type == "REAL":
+        return round(rng.uniform(0, 1000), 3)
+    if column_type == "BLOB":
+        return rng.randbytes(rng.randint(16, 1024))
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 60 if column_type == "TEXT" else 8)))
+
+
+def build_database(db_path: str, tables: int, columns: int, rows: int, seed: int = 1) -> Dict[str, int]:
+    """(Re)create db_path with the given number of tables, data columns per table and rows per table."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    names: List[str] = []
+    try:
+        with conn:
+            for i in range(tables):
+                name = f"{TABLE_STEMS[i % len(TABLE_STEMS)]}_{i}"
+                types = [rng.choice(COLUMN_TYPES) for _ in range(columns)]
+                definitions = ["id INTEGER PRIMARY KEY"] + [f"col_{c} {t}" for c, t in enumerate(types)]
+                parents = rng.sample(names, min(len(names), rng.randint(0, 2)))
+                definitions += [f"{parent}_id INTEGER REFERENCES {parent}(id)" for parent in parents]
+                conn.execute(f"CREATE TABLE {name} ({', '.join(definitions)});")
+                placeholders = ", ".join("?" * (len(definitions)))
+                conn.executemany(
+                    f"INSERT INTO {name} VALUES ({placeholders});",
+                    [
+                        (row_id, *(_value(rng, t) for t in types), *(rng.randint(1, rows) for _ in parents))
+                        for row_id in range(1, rows + 1)
+                    ],
+                )
+                names.append(name)
+            if names:
+                conn.execute(f"CREATE VIEW recent_{names[0]} AS SELECT * FROM {names[0]} ORDER BY id DESC;")
+    finally:
+        conn.close()
+    print(f"Wrote {tables} tables with {rows} rows each to {db_path}")
+    return {"tables": tables, "columns": columns, "rows": rows}
+
+
+def run_benchmark(db_path: str, repeats: int = 5) -> Dict[str, float]:
+    """Time a cold and a cached structure load and repeated samples through the SQLite backend."""
+    backend = db_backends.SQLiteBackend(db_path=db_path)
+    timings = {}
+    started = time.perf_counter()
+    structure = backend.fetch_table_structure()
+    timings["structure_cold"] = time.perf_counter() - started
+    started = time.perf_counter()
+    backend.fetch_table_structure()
+    timings["structure_cached"] = time.perf_counter() - started
+    sample_tables = list(structure)[:repeats]
+    started = time.perf_counter()
+    for name in sample_tables:
+        backend.fetch_specific_table(name, limit=5)
+    timings["sample_per_table"] = (time.perf_counter() - started) / max(len(sample_tables), 1)
+    backend.pool.close_all()
+    for label, seconds in timings.items():
+        print(f"{label}: {seconds * 1000:.2f} ms")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a large SQLite schema for offline DB benchmarks.")
+    parser.add_argument("--db", default=db_backends.SQLITE_DB_PATH, help="Path of the SQLite database to (re)create.")
+    parser.add_argument("--tables", type=int, default=1500, help="Number of tables.")
+    parser.add_argument("--columns", type=int, default=12, help="Data columns per table (besides keys).")
+    parser.add_argument("--rows", type=int, default=200, help="Rows per table.")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed, so runs are reproducible.")
+    parser.add_argument("--bench", action="store_true", help="Time schema and sample calls after generating.")
+    args = parser.parse_args()
+    build_database(args.db, args.tables, args.columns, args.rows, args.seed)
+    if args.bench:
+        run_benchmark(args.db)
@@ -0,0 +1,57 @@
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Tuple
+
+# Parsed spaCy Docs shared by every NLP consumer, keyed by normalized text, so
+# one /combined request parses each distinct requirement text exactly once.
+# The cache is bounded by an estimate of Doc memory and evicts least recently used.
+MAX_CACHE_BYTES = int(os.environ.get("NLP_DOC_CACHE_MB", "64")) * 1024 * 1024
+# Rough per-token footprint of a Doc from a small pipeline without vectors.
+BYTES_PER_TOKEN = 512
+
+_WHITESPACE = re.compile(r"\s+")
+
+_docs: "OrderedDict[Tuple[int, str], Tuple[Any, int]]" = OrderedDict()
+_cached_bytes = 0
+_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used as the cache key (and parsed): NFC, single spaces, stripped."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def _estimate_bytes(doc: Any) -> int:
+    return len(doc) * BYTES_PER_TOKEN + len(doc.text)
+
+
+def parse(text: str, nlp: Any) -> Any:
+    """Return nlp(normalized text), reusing the cached Doc when this pipeline has parsed it before."""
+    global _cached_bytes
+    key = (id(nlp), normalize_text(text))
+    with _lock:
+        entry = _docs.get(key)
+        if entry is not None:
+            _docs.move_to_end(key)
+            return entry[0]
+    doc = nlp(key[1])
+    size = _estimate_bytes(doc)
+    with _lock:
+        if key not in _docs and size <= MAX_CACHE_BYTES:
+            _docs[key] = (doc, size)
+            _cached_bytes += size
+            while _cached_bytes > MAX_CACHE_BYTES:
+                _, (_, evicted_size) = _docs.popitem(last=False)
+                _cached_bytes -= evicted_size
+    return doc
+
+
+def clear() -> None:
+    """Drop every cached Doc."""
+    global _cached_bytes
+    with _lock:
+        _docs.clear()
+        _cached_bytes = 0
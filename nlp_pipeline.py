@@ -0,0 +1,131 @@
+import os
+import sys
+import threading
+import time
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+# Shared, lazily loaded spaCy pipeline for the integration modules.
+#
+# The modules only read doc.noun_chunks, doc.sents and doc.ents. Those need
+# tok2vec, tagger and parser (noun chunks and sentences) plus ner (entities).
+# attribute_ruler must also stay, because it maps tags to the POS values the
+# English noun-chunk iterator checks. Without it noun_chunks comes back empty.
+# The lemmatizer is never used, so it is excluded and never loaded.
+#
+# Measure cold start and RSS on a deployment host with:
+#   python nlp_pipeline.py full       load with every component
+#   python nlp_pipeline.py trimmed    load without EXCLUDED_COMPONENTS
+#   python nlp_pipeline.py import     fresh-process import cost: lazy (import
+#                                     nlp_pipeline) vs. the old eager spacy.load
+# Each run uses a fresh process so the numbers are not skewed by imports.
+#
+# Figures for en_core_web_sm itself have not been recorded yet (the model was
+# not installable where this was measured). With a stand-in pipeline (same six
+# components, spaCy's CPU-efficiency config, untrained weights; spaCy 3.8,
+# Python 3.11, Linux, 3 runs each) the script gave:
+#   full      load 0.44s, first parse 4 ms, peak RSS +107 MB
+#   trimmed   load 0.43s, first parse 4 ms, peak RSS +102 MB
+#   import    lazy 0.02s, peak RSS 14 MB; eager spacy.load 0.52s, 116 MB
+# Trimming did not measurably change load time. What the stand-in shows is
+# that module import no longer pays for spaCy; the load moves to warmup() or
+# the first parse.
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_sm")
+EXCLUDED_COMPONENTS = [c for c in os.environ.get("SPACY_EXCLUDE", "lemmatizer").split(",") if c]
+# Defaults for bulk processing with nlp.pipe (nightly requirement analysis).
+BATCH_SIZE = int(os.environ.get("NLP_BATCH_SIZE", "64"))
+N_PROCESS = int(os.environ.get("NLP_PROCESSES", "1"))
+
+_nlp: Optional[Any] = None
+_lock = threading.Lock()
+
+
+def load_pipeline(exclude: Optional[List[str]] = None) -> Any:
+    """Load SPACY_MODEL without the excluded components."""
+    import spacy  # deferred so importing an integration module does not pay for spaCy
+
+    return spacy.load(SPACY_MODEL, exclude=EXCLUDED_COMPONENTS if exclude is None else exclude)
+
+
+def get_nlp() -> Any:
+    """Return the shared pipeline, loading it on first use."""
+    global _nlp
+    if _nlp is None:
+        with _lock:
+            if _nlp is None:
+                started = time.perf_counter()
+                _nlp = load_pipeline()
+                print(f"Loaded spaCy model {SPACY_MODEL} {_nlp.pipe_names} in {time.perf_counter() - started:.2f}s")
+    return _nlp
+
+
+def warmup() -> None:
+    """Load the pipeline and run one short parse so the first request does not pay for it."""
+    try:
+        get_nlp()("Warm up the parser and entity recognizer.")
+    except Exception as e:
+        print(f"Error warming up spaCy pipeline: {e}")
+
+
+def warmup_in_background() -> threading.Thread:
+    """Start warmup() on a daemon thread; servers call this at startup."""
+    thread = threading.Thread(target=warmup, name="spacy-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def pipe_docs(texts: Iterable[str], batch_size: Optional[int] = None,
+              n_process: Optional[int] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Stream (text, Doc) pairs for many texts through nlp.pipe, in input order.
+    n_process > 1 forks worker processes; on Windows call this under `if __name__ == "__main__":`.
+    Bulk docs bypass nlp_cache so a nightly run does not evict the request cache.
+    """
+    nlp = get_nlp()
+    pairs = ((text, text) for text in texts)
+    docs = nlp.pipe(
+        pairs,
+        as_tuples=True,
+        batch_size=BATCH_SIZE if batch_size is None else batch_size,
+        n_process=N_PROCESS if n_process is None else n_process,
+    )
+    for doc, text in docs:
+        yield text, doc
+
+
+def _max_rss_mb(who: Optional[int] = None) -> float:
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _child_cost(code: str) -> Tuple[float, float]:
+    """Wall time and peak RSS (MB, largest child so far) of running code in a fresh interpreter."""
+    import resource
+    import subprocess
+
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - started, _max_rss_mb(resource.RUSAGE_CHILDREN)
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "trimmed"
+    if mode == "import":
+        # Lazy first: the children's peak RSS only grows.
+        lazy = _child_cost("import nlp_pipeline, sys; assert 'spacy' not in sys.modules")
+        eager = _child_cost(f"import spacy; spacy.load({SPACY_MODEL!r})")
+        print(f"import: lazy {lazy[0]:.2f}s, peak RSS {lazy[1]:.0f} MB; "
+              f"eager spacy.load {eager[0]:.2f}s, peak RSS {eager[1]:.0f} MB")
+        sys.exit(0)
+    baseline = _max_rss_mb()
+    started = time.perf_counter()
+    pipeline = load_pipeline(exclude=[] if mode == "full" else None)
+    loaded = time.perf_counter()
+    pipeline("The vehicle shall stop within 40 m from 100 km/h on dry asphalt.")
+    parsed = time.perf_counter()
+    print(f"{mode}: components={pipeline.pipe_names}")
+    print(f"  load {loaded - started:.2f}s, first parse {parsed - loaded:.3f}s, "
+          f"peak RSS +{_max_rss_mb() - baseline:.0f} MB")
@@ -0,0 +1,70 @@
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Iterator, List, Optional, Tuple
+
+import PyPDF2
+
+import pdf_text_cache
+
+# Page-parallel PDF text extraction. Page ranges are sharded across a process
+# pool; pages are yielded in document order as soon as their shard finishes,
+# so chunking and indexing can start before the whole document is parsed.
+MAX_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+SHARD_PAGES = int(os.environ.get("PDF_EXTRACT_SHARD_PAGES", "16"))
+
+_worker_reader: Optional[PyPDF2.PdfReader] = None
+
+
+def _init_worker(path: Optional[str], pdf_data: Optional[bytes]) -> None:
+    """
+    Open the PDF once per worker process; shards only carry page ranges.
+    Mapped sources are re-mapped by path so workers share the OS page cache.
+    """
+    global _worker_reader
+    if path:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _worker_reader = PyPDF2.PdfReader(mapped)
+    else:
+        _worker_reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+
+
+def _extract_page(reader: PyPDF2.PdfReader, page_number: int) -> str:
+    # Errors propagate: a blank stand-in page would be cached as if the document had parsed.
+    return reader.pages[page_number].extract_text() or ""
+
+
+def _extract_shard(page_range: Tuple[int, int]) -> List[str]:
+    start, end = page_range
+    return [_extract_page(_worker_reader, n) for n in range(start, end)]
+
+
+def iter_pdf_pages(pdf_file: BytesIO, workers: Optional[int] = None,
+                   shard_pages: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the text of each page of the PDF stream pdf_file, in order; raises on an unreadable page.
+    Documents no larger than one shard, or workers=1, are parsed in-process.
+    """
+    workers = MAX_WORKERS if workers is None else workers
+    shard_pages = SHARD_PAGES if shard_pages is None else shard_pages
+    reader = PyPDF2.PdfReader(pdf_file)
+    page_count = len(reader.pages)
+    if workers <= 1 or page_count <= shard_pages:
+        for page_number in range(page_count):
+            yield _extract_page(reader, page_number)
+        return
+    shards = [(start, min(start + shard_pages, page_count)) for start in range(0, page_count, shard_pages)]
+    path = getattr(pdf_file, "path", None)
+    initargs = (path, None) if path else (None, bytes(pdf_text_cache.pdf_bytes(pdf_file)))
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards)),
+                             initializer=_init_worker, initargs=initargs) as pool:
+        futures = [pool.submit(_extract_shard, shard) for shard in shards]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Stop queued shards if the consumer abandons the generator early.
+            for future in futures:
+                future.cancel()
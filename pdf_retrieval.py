@@ -0,0 +1,181 @@
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+import pdf_text_cache
+import requirement_dedup
+
+# Retrieval over the reference PDF: pages are split into section-aware chunks,
+# indexed with BM25 and only the chunks most relevant to the user requirement
+# are placed in the prompt, up to a configurable token budget.
+TOKEN_BUDGET = int(os.environ.get("PDF_CONTEXT_TOKEN_BUDGET", "1500"))
+TOP_K = int(os.environ.get("PDF_CONTEXT_TOP_K", "8"))
+CHUNK_WORDS = int(os.environ.get("PDF_CHUNK_WORDS", "200"))
+MAX_CACHED_INDEXES = 8
+
+HEADING_PATTERN = re.compile(
+    r"^((?i:chapter|appendix)\s+\w+.*|\d+(\.\d+)*\.?\s+[A-Z][^.]{2,80}|[A-Z][A-Z0-9 ,:&\-]{3,80})$"
+)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "i", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was", "were", "which",
+    "will", "with", "we", "our", "can", "should", "shall", "must", "need", "please", "system",
+}
+
+_index_cache: "OrderedDict[str, BM25Index]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens used for both indexing and queries."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if len(t) > 1 and t not in STOP_WORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _is_heading(line: str) -> bool:
+    return len(line.split()) <= 12 and bool(HEADING_PATTERN.match(line))
+
+
+def chunk_pages(pages: Iterable[str], chunk_words: int = CHUNK_WORDS) -> List[Dict[str, Any]]:
+    """
+    Split page texts into chunks of at most chunk_words words.
+    A chunk never spans two pages or two sections; each chunk records its
+    1-based page number and the most recent section heading.
+    """
+    chunks = []
+    section = ""
+    for page_number, page_text in enumerate(pages, start=1):
+        words: List[str] = []
+        for line in (page_text or "").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if _is_heading(line):
+                if words:
+                    chunks.append({"page": page_number, "section": section, "text": " ".join(words)})
+                    words = []
+                section = line
+            words.extend(line.split())
+            while len(words) >= chunk_words:
+                chunks.append({"page": page_number, "section": section, "text": " ".join(words[:chunk_words])})
+                words = words[chunk_words:]
+        if words:
+            chunks.append({"page": page_number, "section": section, "text": " ".join(words)})
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over chunk texts, stored as term-sorted posting arrays."""
+
+    def __init__(self, chunks: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        doc_ids, term_ids, counts, lengths = [], [], [], []
+        for doc_id, chunk in enumerate(chunks):
+            terms = tokenize(f"{chunk['section']} {chunk['text']}")
+            lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                doc_ids.append(doc_id)
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                counts.append(count)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        self.posting_docs = np.asarray(doc_ids, dtype=np.int64)[order]
+        self.posting_tf = np.asarray(counts, dtype=np.float64)[order]
+        self.offsets = np.searchsorted(term_ids[order], np.arange(len(self.vocabulary) + 1))
+        self.doc_lengths = np.asarray(lengths, dtype=np.float64)
+        self.avg_length = float(self.doc_lengths.mean()) if len(chunks) else 0.0
+        doc_freq = np.diff(self.offsets)
+        self.idf = np.log(1.0 + (len(chunks) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def search(self, query: str, top_k: int = TOP_K) -> List[int]:
+        """Return the ids of the top_k chunks with a positive BM25 score, best first."""
+        if not self.chunks:
+            return []
+        scores = np.zeros(len(self.chunks))
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths / max(self.avg_length, 1.0))
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.posting_docs[start:end]
+            tf = self.posting_tf[start:end]
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1.0) / (tf + norm[docs])
+        ranked = np.argsort(-scores, kind="stable")[:top_k]
+        return [int(i) for i in ranked if scores[i] > 0]
+
+
+def get_pdf_index(pdf_file: BytesIO, extract_pages: Callable[[BytesIO], Iterable[str]]) -> BM25Index:
+    """
+    Build (or reuse) the chunk index for a PDF, keyed by the hash of its bytes.
+    extract_pages may stream: pages are chunked as they are yielded.
+    """
+    digest = pdf_text_cache.pdf_file_digest(pdf_file)
+    with _index_lock:
+        if digest in _index_cache:
+            _index_cache.move_to_end(digest)
+            return _index_cache[digest]
+    index = BM25Index(chunk_pages(extract_pages(pdf_file)))
+    with _index_lock:
+        _index_cache[digest] = index
+        while len(_index_cache) > MAX_CACHED_INDEXES:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def select_chunks(index: BM25Index, query: str, token_budget: int = TOKEN_BUDGET,
+                  top_k: int = TOP_K) -> List[Dict[str, Any]]:
+    """
+    Pick the highest ranked distinct chunks that fit in token_budget, returned in document order.
+    Falls back to the opening chunks when nothing in the query matches the document.
+    """
+    ranked = index.search(query, top_k) or list(range(min(top_k, len(index.chunks))))
+    # Drop near-duplicate chunks (repeated boilerplate, copied requirements) in rank order.
+    ranked = [ranked[i] for i in requirement_dedup.unique_indices([index.chunks[c]["text"] for c in ranked])]
+    selected, used = [], 0
+    for chunk_id in ranked:
+        cost = estimate_tokens(index.chunks[chunk_id]["text"])
+        if used + cost > token_budget:
+            continue
+        selected.append(chunk_id)
+        used += cost
+    return [index.chunks[i] for i in sorted(selected)]
+
+
+def format_chunks(chunks: List[Dict[str, Any]]) -> str:
+    """Render chunks for a prompt, each tagged with its page and section."""
+    parts = []
+    for chunk in chunks:
+        label = f"p. {chunk['page']}"
+        if chunk.get("document"):
+            label = f"{chunk['document']}, {label}"
+        if chunk["section"]:
+            label += f" | {chunk['section']}"
+        parts.append(f"[{label}] {chunk['text']}")
+    return "\n\n".join(parts)
+
+
+def build_pdf_context(query: str, pdf_file: BytesIO, extract_pages: Callable[[BytesIO], Iterable[str]],
+                      token_budget: Optional[int] = None, top_k: Optional[int] = None) -> str:
+    """Return the PDF excerpts most relevant to query, bounded by token_budget."""
+    index = get_pdf_index(pdf_file, extract_pages)
+    chunks = select_chunks(
+        index,
+        query,
+        TOKEN_BUDGET if token_budget is None else token_budget,
+        TOP_K if top_k is None else top_k,
+    )
+    return format_chunks(chunks)
@@ -0,0 +1,107 @@
+import hashlib
+import io
+import mmap
+from typing import Any, Optional
+
+
+class PdfView(io.RawIOBase):
+    """
+    A read-only, seekable stream over a shared PDF buffer.
+    Each view has its own position, so concurrent requests never move each other's reads.
+    """
+
+    def __init__(self, buffer: memoryview, path: Optional[str] = None, digest: Optional[str] = None):
+        super().__init__()
+        self._buffer = buffer
+        self._position = 0
+        self.path = path
+        self.digest = digest
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._buffer) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position.")
+        self._position = position
+        return position
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._buffer) if size is None or size < 0 else min(self._position + size, len(self._buffer))
+        data = self._buffer[self._position:end].tobytes() if end > self._position else b""
+        self._position = max(self._position, end)
+        return data
+
+    def readinto(self, target) -> int:
+        data = self.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+    def getbuffer(self) -> memoryview:
+        """Zero-copy access to the whole PDF (used for hashing); releasing it leaves the view usable."""
+        return memoryview(self._buffer)
+
+
+class PdfSource:
+    """
+    A PDF file memory-mapped read-only. Worker processes that map the same file
+    share its pages through the OS cache instead of each holding a BytesIO copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        self.digest = hashlib.sha256(self._buffer).hexdigest()
+
+    def open_view(self) -> PdfView:
+        """Return a fresh per-request view; views share memory but not stream position."""
+        if self._mmap is None:
+            raise ValueError(f"PDF source {self.path} is closed.")
+        return PdfView(memoryview(self._mmap), self.path, self.digest)
+
+    def close(self) -> None:
+        """
+        Unmap the file. Views still being read keep their own reference to the mapping,
+        which is then released when the last of them is garbage collected.
+        """
+        if self._mmap is None:
+            return
+        mapping, self._mmap = self._mmap, None
+        self._buffer.release()
+        try:
+            mapping.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "PdfSource":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def open_pdf_source(path: str) -> Optional[PdfSource]:
+    """Map the PDF at path, printing the error and returning None if it cannot be opened."""
+    try:
+        source = PdfSource(path)
+        print(f"PDF mapped from {path}")
+        return source
+    except Exception as e:
+        print(f"Error loading PDF: {e}")
+        return None
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, Iterable, Iterator, List, Optional
+
+# Extracted PDF pages keyed by the SHA-256 of the PDF bytes.
+# Layer 1 is an in-process LRU, layer 2 is a directory of <digest>.txt files
+# (pages separated by form feeds) that survives restarts, so each document is
+# parsed once per deployment.
+CACHE_DIR = os.environ.get("PDF_TEXT_CACHE_DIR", ".pdf_text_cache")
+MAX_MEMORY_ENTRIES = int(os.environ.get("PDF_TEXT_CACHE_SIZE", "16"))
+
+PAGE_SEPARATOR = "\f"
+
+_memory_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def pdf_bytes(pdf_file: BytesIO) -> memoryview:
+    """Return the full contents of a PDF stream, without copying when the stream exposes its buffer."""
+    if hasattr(pdf_file, "getbuffer"):
+        return pdf_file.getbuffer()
+    position = pdf_file.tell()
+    pdf_file.seek(0)
+    data = pdf_file.read()
+    pdf_file.seek(position)
+    return memoryview(data)
+
+
+def pdf_digest(data: bytes) -> str:
+    """Content hash used as the cache key for a PDF."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def pdf_file_digest(pdf_file: BytesIO) -> str:
+    """Content hash of a PDF stream, reusing the digest a mapped PdfView already carries."""
+    digest = getattr(pdf_file, "digest", None)
+    if digest:
+        return digest
+    with pdf_bytes(pdf_file) as data:
+        return pdf_digest(data)
+
+
+def _disk_path(digest: str) -> str:
+    return os.path.join(CACHE_DIR, f"{digest}.txt")
+
+
+def _remember(digest: str, pages: List[str]) -> None:
+    with _lock:
+        _memory_cache[digest] = pages
+        _memory_cache.move_to_end(digest)
+        while len(_memory_cache) > MAX_MEMORY_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+
+def get_cached_pages(digest: str) -> Optional[List[str]]:
+    """Look up extracted pages in memory, then on disk. Returns None on a miss."""
+    with _lock:
+        if digest in _memory_cache:
+            _memory_cache.move_to_end(digest)
+            return _memory_cache[digest]
+    try:
+        with open(_disk_path(digest), "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        print(f"Error reading PDF text cache: {e}")
+        return None
+    pages = text.split(PAGE_SEPARATOR)
+    _remember(digest, pages)
+    return pages
+
+
+def store_cached_pages(digest: str, pages: List[str]) -> None:
+    """Store extracted pages in memory and write them atomically to the disk cache."""
+    _remember(digest, pages)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(PAGE_SEPARATOR.join(page.replace(PAGE_SEPARATOR, "\n") for page in pages))
+        os.replace(tmp_path, _disk_path(digest))
+    except OSError as e:
+        print(f"Error writing PDF text cache: {e}")
+
+
+def stream_pdf_pages(pdf_file: BytesIO, extract: Callable[[BytesIO], Iterable[str]]) -> Iterator[str]:
+    """
+    Yield the page texts of pdf_file as extract(pdf_file) produces them (or from the cache), so
+    chunking can start before the last page is parsed. The pages are cached only once extract
+    has finished; an error, or a consumer that stops early, leaves the cache untouched.
+    Empty results (PDFs without a text layer) are not cached either.
+    """
+    digest = pdf_file_digest(pdf_file)
+    cached = get_cached_pages(digest)
+    if cached is not None:
+        yield from cached
+        return
+    pages = []
+    for page_text in extract(pdf_file):
+        pages.append(page_text)
+        yield page_text
+    if any(pages):
+        store_cached_pages(digest, pages)
+
+
+def cached_pdf_pages(pdf_file: BytesIO, extract: Callable[[BytesIO], Iterable[str]]) -> List[str]:
+    """
+    Return the page texts of pdf_file, calling extract(pdf_file) only on a cache miss.
+    extract must raise rather than return a partial page list; its errors propagate uncached.
+    """
+    return list(stream_pdf_pages(pdf_file, extract))
+
+
+def clear_memory_cache() -> None:
+    """Drop the in-process layer (the disk layer is left untouched)."""
+    with _lock:
+        _memory_cache.clear()
@@ -0,0 +1,141 @@
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# Near-duplicate detection for requirement text. Each text is reduced to the set
+# of its character shingles, MinHash signatures are computed for many texts at
+# once with NumPy, and LSH banding buckets the signatures so only texts sharing
+# a band are ever compared. That keeps large corpora well below the all-pairs
+# cost. Candidate pairs are confirmed by their estimated Jaccard similarity.
+#
+# Paraphrased copies of a requirement that state a different number are kept
+# apart: "respond within 2 s" and "respond within 5 s" are distinct requirements.
+SHINGLE_CHARS = 5
+NUM_PERM = 128
+BANDS = 32  # 32 bands of 4 rows: pairs at Jaccard 0.6 become candidates ~99% of the time
+THRESHOLD = float(os.environ.get("REQ_DEDUP_THRESHOLD", "0.6"))
+# Upper bound on shingles hashed per NumPy block (NUM_PERM x block uint64 values).
+BLOCK_SHINGLES = 32768
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def shingle_hashes(text: str, k: int = SHINGLE_CHARS) -> np.ndarray:
+    """32-bit hashes of the distinct k-character shingles of the normalized text."""
+    norm = normalize(text)
+    if len(norm) <= k:
+        grams = {norm}
+    else:
+        grams = {norm[i:i + k] for i in range(len(norm) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash_signatures(texts: Sequence[str]) -> np.ndarray:
+    """Return a (len(texts), NUM_PERM) uint64 MinHash signature matrix."""
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint64)
+    shingles = [shingle_hashes(t) for t in texts]
+    start = 0
+    while start < len(texts):
+        # Hash a block of texts in one pass, then take each text's column-wise minimum.
+        end, total = start, 0
+        while end < len(texts) and (end == start or total + len(shingles[end]) <= BLOCK_SHINGLES):
+            total += len(shingles[end])
+            end += 1
+        block = np.concatenate(shingles[start:end])
+        hashed = (_PERM_A[:, None] * block[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+        offsets = np.cumsum([0] + [len(s) for s in shingles[start:end - 1]])
+        signatures[start:end] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        start = end
+    return signatures
+
+
+def _band_buckets(signatures: np.ndarray, bands: int = BANDS) -> Iterator[List[int]]:
+    """Yield every LSH bucket (texts whose signatures agree on a whole band) with two or more members."""
+    rows = signatures.shape[1] // bands
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        band_rows = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(len(band_rows)):
+            buckets[band_rows[i].tobytes()].append(i)
+        for members in buckets.values():
+            if len(members) > 1:
+                yield members
+
+
+def find_duplicate_groups(texts: Sequence[str], threshold: Optional[float] = None) -> List[List[int]]:
+    """
+    Group near-duplicate texts. Returns lists of indices (ascending) for every group
+    with more than one member; the first index of a group is its earliest text.
+    """
+    threshold = THRESHOLD if threshold is None else threshold
+    if len(texts) < 2:
+        return []
+    signatures = minhash_signatures(texts)
+    numbers = [_NUMBER.findall(t) for t in texts]
+    parent = list(range(len(texts)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for members in _band_buckets(signatures):
+        # Only texts sharing a bucket are compared, each against the earlier members at once.
+        block = signatures[members]
+        for j in range(1, len(members)):
+            agreement = np.count_nonzero(block[:j] == block[j], axis=1)
+            for i in np.flatnonzero(agreement >= threshold * NUM_PERM):
+                a, b = members[i], members[j]
+                if numbers[a] != numbers[b]:
+                    continue
+                ra, rb = root(a), root(b)
+                if ra != rb:
+                    parent[max(ra, rb)] = min(ra, rb)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(texts)):
+        groups[root(i)].append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def unique_indices(texts: Sequence[str], threshold: Optional[float] = None) -> List[int]:
+    """Indices of the texts to keep: the first of each near-duplicate group, in input order."""
+    dropped = {i for group in find_duplicate_groups(texts, threshold) for i in group[1:]}
+    return [i for i in range(len(texts)) if i not in dropped]
+
+
+def dedupe(texts: Sequence[str], threshold: Optional[float] = None) -> List[str]:
+    """Return texts with near-duplicates removed, keeping the first copy of each."""
+    return [texts[i] for i in unique_indices(texts, threshold)]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Cheap sentence split for requirement text (terminal punctuation or line breaks)."""
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+def dedupe_sentences(text: str, threshold: Optional[float] = None) -> str:
+    """Collapse near-duplicate sentences of text, keeping the first copy of each; text without duplicates is returned as is."""
+    sentences = split_sentences(text)
+    if len(sentences) < 2:
+        return text.strip()
+    kept = dedupe(sentences, threshold)
+    return text.strip() if len(kept) == len(sentences) else " ".join(kept)
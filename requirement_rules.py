@@ -0,0 +1,126 @@
+import bisect
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+# One rule engine for requirement phrase extraction and spec categorization.
+# Keyword rules are compiled once into a spaCy Matcher (one token pattern per
+# label, so each token is tested against a single precompiled prefix regex);
+# digits and units use precompiled regexes over the whole text. Every match is
+# reduced to character offsets, and entities, noun chunks and sentences are
+# labelled by bisecting those offsets, so a document is scanned once.
+#
+# Terms match at the start of a word ("safe" matches "safety", "monitor"
+# matches "monitoring"), and multi-word terms match token by token.
+KEYWORD = "keyword"
+RULES: Dict[str, List[str]] = {
+    KEYWORD: [
+        "constraint", "model", "equation", "state machine", "differential equation",
+        "threshold", "limit", "performance", "acceleration", "speed", "force", "balance",
+        "representation", "convert", "compare", "problem space",
+    ],
+    "performance": ["speed", "acceleration", "time", "performance", "efficiency", "throughput", "response"],
+    "stability": ["balance", "stability", "control", "reliability", "robustness", "consistent"],
+    "safety": ["safe", "emergency", "protect", "security", "privacy", "backup"],
+    "verification": ["verify", "validate", "test", "simulation", "check", "audit", "monitor"],
+}
+SPEC_CATEGORIES = ["performance", "stability", "safety", "verification"]
+
+NUMERIC_ENTITY_LABELS = {"QUANTITY", "CARDINAL", "PERCENT", "TIME", "DATE", "ORDINAL"}
+TRIVIAL_PHRASES = {"i", "am", "a", "the", "it", "these", "this", "that"}
+DIGIT_PATTERN = re.compile(r"\d")
+UNIT_PATTERN = re.compile(r"\b(sec|second|mph|km/h|ms|g|kg|Hz|%)\b", re.IGNORECASE)
+NUMERIC = "numeric"
+
+Span = Tuple[int, int]
+
+_engines: Dict[int, "RequirementRuleEngine"] = {}
+_engines_lock = threading.Lock()
+
+
+def _prefix_regex(words: List[str]) -> str:
+    alternatives = sorted({re.escape(w.lower()) for w in words}, key=len, reverse=True)
+    return "^(?:" + "|".join(alternatives) + ")"
+
+
+class RequirementRuleEngine:
+    """Compiled keyword, digit and unit rules for one spaCy vocabulary."""
+
+    def __init__(self, vocab: Any):
+        from spacy.matcher import Matcher  # deferred like nlp_pipeline's spaCy import: only needed once a model loads
+
+        self.matcher = Matcher(vocab)
+        for label, terms in RULES.items():
+            single = [t for t in terms if " " not in t]
+            patterns = [[{"LOWER": {"REGEX": _prefix_regex(single)}}]] if single else []
+            for term in terms:
+                words = term.lower().split()
+                if len(words) > 1:
+                    patterns.append([{"LOWER": w} for w in words[:-1]] + [{"LOWER": {"REGEX": _prefix_regex(words[-1:])}}])
+            self.matcher.add(label, patterns)
+
+    def match_offsets(self, doc: Any) -> Dict[str, List[int]]:
+        """Sorted start offsets of every rule hit, per label (plus NUMERIC for digits/units)."""
+        hits: Dict[str, List[int]] = {label: [] for label in RULES}
+        strings = doc.vocab.strings
+        for match_id, start, _ in self.matcher(doc):
+            hits[strings[match_id]].append(doc[start].idx)
+        hits[NUMERIC] = [m.start() for m in DIGIT_PATTERN.finditer(doc.text)]
+        hits[NUMERIC].extend(m.start() for m in UNIT_PATTERN.finditer(doc.text))
+        for offsets in hits.values():
+            offsets.sort()
+        return hits
+
+    @staticmethod
+    def _hit(offsets: List[int], span: Span) -> bool:
+        i = bisect.bisect_left(offsets, span[0])
+        return i < len(offsets) and offsets[i] < span[1]
+
+    def analyze(self, doc: Any) -> Dict[str, Any]:
+        """
+        Return the important phrases and spec categories of doc in one pass:
+          "phrases": [(start_char, text)] in order of first appearance
+          "categories": {category: [(start_char, sentence text)]} in sentence order
+        """
+        hits = self.match_offsets(doc)
+        sentences = list(doc.sents) if doc.has_annotation("SENT_START") else [doc[:]]
+        chunks = list(doc.noun_chunks) if doc.has_annotation("DEP") else []
+
+        first_seen: Dict[str, int] = {}
+
+        def add(text: str, start: int) -> None:
+            phrase = text.strip()
+            if len(phrase) < 4 or phrase.lower() in TRIVIAL_PHRASES:
+                return
+            if phrase not in first_seen or start < first_seen[phrase]:
+                first_seen[phrase] = start
+
+        for ent in doc.ents:
+            if ent.label_ in NUMERIC_ENTITY_LABELS or self._hit(hits[NUMERIC], (ent.start_char, ent.end_char)):
+                add(ent.text, ent.start_char)
+        for span in chunks + sentences:
+            bounds = (span.start_char, span.end_char)
+            if self._hit(hits[KEYWORD], bounds) or self._hit(hits[NUMERIC], bounds):
+                add(span.text, span.start_char)
+
+        categories: Dict[str, List[Tuple[int, str]]] = {c: [] for c in SPEC_CATEGORIES}
+        for sent in sentences:
+            bounds = (sent.start_char, sent.end_char)
+            for category in SPEC_CATEGORIES:
+                if self._hit(hits[category], bounds):
+                    categories[category].append((sent.start_char, sent.text))
+
+        phrases = sorted(((start, text) for text, start in first_seen.items()), key=lambda p: (p[0], p[1]))
+        return {"phrases": phrases, "categories": categories}
+
+
+def get_rule_engine(nlp: Any) -> RequirementRuleEngine:
+    """Return the engine compiled for nlp's vocabulary, building it on first use."""
+    key = id(nlp)
+    engine = _engines.get(key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = _engines[key] = RequirementRuleEngine(nlp.vocab)
+    return engine
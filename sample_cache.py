@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+import schema_introspection
+import table_sampling
+
+# Result cache for fetch_specific_table, so tables named in request after
+# request are sampled once and then served from memory. Entries are keyed by
+# table and sampling parameters (row limit, SAMPLE_METHOD, column byte cap).
+# Inside SAMPLE_CACHE_TTL a cached sample is returned without touching the
+# database; after that a one-row probe of the table's modification counters
+# decides whether it changed, and an unchanged table just renews its entry.
+#
+# Table probes:
+#   MS SQL    row count (sys.dm_db_partition_stats), last user update
+#             (sys.dm_db_index_usage_stats) and MAX of the table's rowversion
+#             column, if it has one (index it to keep the probe a seek)
+#   Postgres  pg_stat_user_tables insert/update/delete counters and the relfilenode,
+#             which changes on TRUNCATE and table rewrites. MAX(xmin) would need a
+#             scan, so the counters stand in for it; they are published when the
+#             writing transaction ends.
+#   SQLite    modification time and size of the database file and its WAL
+# Tables the probe knows nothing about (views, tables missing from the schema
+# snapshot, probes the login may not run) are sampled every time.
+SAMPLE_CACHE_TTL = float(os.environ.get("SAMPLE_CACHE_TTL", "5"))
+SAMPLE_CACHE_MAX_ENTRIES = int(os.environ.get("SAMPLE_CACHE_MAX_ENTRIES", "256"))
+
+ROWVERSION_TYPES = {"timestamp", "rowversion"}  # MS SQL only; on Postgres timestamp is a date type
+
+
+def sample_key(table_name: str, limit: int) -> Tuple:
+    """Cache key for a sample of table_name with the current sampling settings."""
+    return (table_name, int(limit), table_sampling.SAMPLE_METHOD, table_sampling.SAMPLE_MAX_COLUMN_BYTES)
+
+
+def rowversion_column(table: schema_introspection.TableSchema) -> Optional[str]:
+    """The MS SQL rowversion column of table, if any."""
+    for column, data_type in table["columns"].items():
+        if table_sampling.base_type(data_type) in ROWVERSION_TYPES:
+            return column
+    return None
+
+
+def table_version_query(dialect: str, schema_name: str, table_name: str,
+                        table: schema_introspection.TableSchema) -> Optional[table_sampling.Query]:
+    """The modification probe for one table, or None when dialect has no SQL probe (SQLite)."""
+    qualified = (f"{table_sampling.quote_identifier(dialect, schema_name)}."
+                 f"{table_sampling.quote_identifier(dialect, table_name)}")
+    if dialect == schema_introspection.MSSQL:
+        query = (
+            "SELECT (SELECT SUM(ps.row_count) FROM sys.dm_db_partition_stats ps "
+            "WHERE ps.object_id = OBJECT_ID(?) AND ps.index_id IN (0, 1)), "
+            "(SELECT MAX(us.last_user_update) FROM sys.dm_db_index_usage_stats us "
+            "WHERE us.database_id = DB_ID() AND us.object_id = OBJECT_ID(?))"
+        )
+        column = rowversion_column(table)
+        if column:
+            query += f", (SELECT MAX({table_sampling.quote_identifier(dialect, column)}) FROM {qualified})"
+        return query + ";", (qualified, qualified)
+    if dialect == schema_introspection.POSTGRES:
+        return (
+            "SELECT s.n_tup_ins, s.n_tup_upd, s.n_tup_del, c.relfilenode "
+            "FROM pg_stat_user_tables s JOIN pg_class c ON c.oid = s.relid "
+            "WHERE s.relid = to_regclass(%s);",
+            (qualified,),
+        )
+    return None
+
+
+def _known(version: Any) -> bool:
+    # A probe row of NULLs (e.g. a view on MS SQL) says nothing about the table.
+    if version is None:
+        return False
+    if isinstance(version, (tuple, list)):
+        return any(value is not None for value in version)
+    return True
+
+
+class SampleCache:
+    """
+    LRU of sampled rows (or anything else computed from a table, e.g. column profiles). Each
+    entry remembers the schema entry it was sampled with, so a reloaded schema drops it,
+    and the table version, so a changed table reloads it.
+    Loads are not coalesced: two requests missing the same key both sample the table.
+    """
+
+    def __init__(self, ttl: float = SAMPLE_CACHE_TTL, max_entries: int = SAMPLE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max(max_entries, 1)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Any, Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, key: Hashable, source: Any) -> Optional[Tuple[Any, Any, Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] is not source:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _fresh(self, key: Hashable, source: Any) -> Any:
+        entry = self._entry(key, source)
+        return entry[0] if entry is not None and time.monotonic() < entry[3] else None
+
+    def _renew_if_unchanged(self, key: Hashable, source: Any, version: Any) -> Any:
+        entry = self._entry(key, source)
+        if entry is None or not _known(version) or version != entry[1]:
+            return None
+        self._store(key, entry[0], version, source)
+        return entry[0]
+
+    def _store(self, key: Hashable, rows: Any, version: Any, source: Any) -> None:
+        if not _known(version):
+            return
+        with self._lock:
+            self._entries[key] = (rows, version, source, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Hashable, source: Any, probe: Callable[[], Any], load: Callable[[], Any]) -> Any:
+        """
+        Cached rows for key, sampled from source (the table's schema entry; None bypasses the
+        cache). probe returns the table's current version; load samples it and may raise.
+        """
+        if source is None:
+            return load()
+        rows = self._fresh(key, source)
+        if rows is not None:
+            return rows
+        try:
+            version = probe()
+        except Exception as e:
+            print(f"Error probing table version: {e}")
+            version = None
+        rows = self._renew_if_unchanged(key, source, version)
+        if rows is not None:
+            return rows
+        rows = load()
+        self._store(key, rows, version, source)
+        return rows
+
+    async def get_async(self, key: Hashable, source: Any, probe: Callable[[], Awaitable[Any]],
+                        load: Callable[[], Awaitable[Any]]) -> Any:
+        """get() for async callers, with awaitable probe and load; shares entries with get()."""
+        if source is None:
+            return await load()
+        rows = self._fresh(key, source)
+        if rows is not None:
+            return rows
+        try:
+            version = await probe()
+        except Exception as e:
+            print(f"Error probing table version: {e}")
+            version = None
+        rows = self._renew_if_unchanged(key, source, version)
+        if rows is not None:
+            return rows
+        rows = await load()
+        self._store(key, rows, version, source)
+        return rows
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        """Drop the cached samples of table_name (any spelling), or of every table."""
+        with self._lock:
+            if table_name is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0].lower() == table_name.lower()]:
+                del self._entries[key]
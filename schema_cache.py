@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import schema_introspection
+
+# Process-wide cache for fetch_table_structure. Inside SCHEMA_CACHE_TTL the
+# cached schema is returned without touching the database. Once the TTL lapses,
+# a one-row freshness probe decides whether the schema changed; if the probe
+# returns the same version as before, the entry is simply renewed and the full
+# introspection query is skipped.
+#
+# Version probes:
+#   MS SQL   latest sys.objects.modify_date (plus an object count, so drops show up)
+#   Postgres counter bumped by a DDL event trigger; install it once with
+#            install_postgres_ddl_counter(). Without it every expiry reloads.
+#   SQLite   PRAGMA schema_version, which SQLite bumps on every schema change
+SCHEMA_CACHE_TTL = float(os.environ.get("SCHEMA_CACHE_TTL", "300"))
+
+VERSION_QUERIES = {
+    schema_introspection.MSSQL: """
+        SELECT MAX(o.modify_date), COUNT(*)
+        FROM sys.objects o
+        JOIN sys.schemas s ON s.schema_id = o.schema_id
+        WHERE s.name = ? AND o.type IN ('U', 'V', 'F', 'PK');
+    """,
+    schema_introspection.POSTGRES: "SELECT version FROM schema_meta.ddl_version;",
+    schema_introspection.SQLITE: "SELECT schema_version FROM pragma_schema_version;",
+}
+
+POSTGRES_DDL_COUNTER_SETUP = """
+    CREATE SCHEMA IF NOT EXISTS schema_meta;
+    CREATE TABLE IF NOT EXISTS schema_meta.ddl_version (
+        id boolean PRIMARY KEY DEFAULT true CHECK (id),
+        version bigint NOT NULL
+    );
+    INSERT INTO schema_meta.ddl_version (version) VALUES (0) ON CONFLICT DO NOTHING;
+    CREATE OR REPLACE FUNCTION schema_meta.bump_ddl_version() RETURNS event_trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE schema_meta.ddl_version SET version = version + 1;
+    END;
+    $$;
+    DROP EVENT TRIGGER IF EXISTS schema_meta_ddl_version;
+    CREATE EVENT TRIGGER schema_meta_ddl_version ON ddl_command_end
+        EXECUTE PROCEDURE schema_meta.bump_ddl_version();
+"""
+
+
+def version_query(dialect: str, schema_name: str) -> Tuple[str, Tuple]:
+    """The freshness probe for dialect and its parameters."""
+    if dialect == schema_introspection.MSSQL:
+        return VERSION_QUERIES[dialect], (schema_name,)
+    return VERSION_QUERIES[dialect], ()  # the Postgres and SQLite counters are database-wide
+
+
+def schema_version(cursor: Any, dialect: str, schema_name: str) -> Any:
+    """Return an opaque token that changes whenever the schema's DDL changes."""
+    cursor.execute(*version_query(dialect, schema_name))
+    row = cursor.fetchone()
+    return tuple(row) if row else None
+
+
+def install_postgres_ddl_counter(conn: Any) -> None:
+    """Create the Postgres DDL counter and its event trigger (needs superuser; run once per database)."""
+    cursor = conn.cursor()
+    cursor.execute(POSTGRES_DDL_COUNTER_SETUP)
+    conn.commit()
+
+
+class SchemaCache:
+    """
+    TTL cache around load, with probe returning the current schema version (or raising
+    when it cannot tell). Empty results are never cached, so a failed load is retried.
+    """
+
+    def __init__(self, load: Callable[[], Dict], probe: Optional[Callable[[], Any]] = None,
+                 ttl: float = SCHEMA_CACHE_TTL):
+        self._load = load
+        self._probe = probe
+        self.ttl = ttl
+        self._value: Optional[Dict] = None
+        self._version: Any = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def _current_version(self) -> Any:
+        if self._probe is None:
+            return None
+        try:
+            return self._probe()
+        except Exception as e:
+            print(f"Error probing schema version: {e}")
+            return None
+
+    def _fresh(self) -> Optional[Dict]:
+        return self._value if self._value is not None and time.monotonic() < self._expires else None
+
+    def _renew_if_unchanged(self, version: Any) -> bool:
+        if self._value is not None and version is not None and version == self._version:
+            self._expires = time.monotonic() + self.ttl
+            return True
+        return False
+
+    def _store(self, value: Dict, version: Any) -> None:
+        if value:
+            self._value, self._version = value, version
+            self._expires = time.monotonic() + self.ttl
+
+    def get(self) -> Dict:
+        """Return the cached schema, revalidating or reloading it once the TTL has passed."""
+        value = self._fresh()
+        if value is not None:
+            return value
+        with self._lock:  # one request refreshes; concurrent ones wait and reuse its result
+            value = self._fresh()
+            if value is not None:
+                return value
+            version = self._current_version()
+            if self._renew_if_unchanged(version):
+                return self._value
+            value = self._load()
+            self._store(value, version)
+            return value
+
+    async def get_async(self, load: Callable[[], Awaitable[Dict]],
+                        probe: Optional[Callable[[], Awaitable[Any]]] = None) -> Dict:
+        """
+        get() for async callers, with awaitable load and probe (e.g. an async driver).
+        Shares the cached entry with get(); concurrent async refreshes are not coalesced.
+        """
+        value = self._fresh()
+        if value is not None:
+            return value
+        version = None
+        if probe is not None:
+            try:
+                version = await probe()
+            except Exception as e:
+                print(f"Error probing schema version: {e}")
+        if self._renew_if_unchanged(version):
+            return self._value
+        value = await load()
+        self._store(value, version)
+        return value
+
+    def invalidate(self) -> None:
+        """Drop the cached schema so the next get() reloads it."""
+        with self._lock:
+            self._value, self._version, self._expires = None, None, 0.0
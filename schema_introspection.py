@@ -0,0 +1,123 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Whole-schema introspection in one round trip. A single catalog query returns
+# one row per column (table, column, type, primary-key flag, referenced table
+# and column, table and column comments), ordered by table and column position. The rows are then grouped
+# client-side. This replaces one INFORMATION_SCHEMA.COLUMNS query per table.
+MSSQL = "mssql"
+POSTGRES = "postgres"
+SQLITE = "sqlite"
+
+# Tables and views in the given schema; a column in several foreign keys yields several rows.
+SCHEMA_QUERIES = {
+    MSSQL: """
+        SELECT o.name, c.name, ty.name,
+               CASE WHEN pk.column_id IS NULL THEN 0 ELSE 1 END,
+               ro.name, rc.name,
+               CAST(tep.value AS NVARCHAR(4000)), CAST(cep.value AS NVARCHAR(4000))
+        FROM sys.objects o
+        JOIN sys.schemas s ON s.schema_id = o.schema_id
+        JOIN sys.columns c ON c.object_id = o.object_id
+        JOIN sys.types ty ON ty.user_type_id = c.user_type_id
+        LEFT JOIN (
+            SELECT ic.object_id, ic.column_id
+            FROM sys.indexes i
+            JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+            WHERE i.is_primary_key = 1
+        ) pk ON pk.object_id = c.object_id AND pk.column_id = c.column_id
+        LEFT JOIN sys.foreign_key_columns fkc
+            ON fkc.parent_object_id = c.object_id AND fkc.parent_column_id = c.column_id
+        LEFT JOIN sys.objects ro ON ro.object_id = fkc.referenced_object_id
+        LEFT JOIN sys.columns rc
+            ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+        LEFT JOIN sys.extended_properties tep
+            ON tep.class = 1 AND tep.major_id = o.object_id AND tep.minor_id = 0 AND tep.name = 'MS_Description'
+        LEFT JOIN sys.extended_properties cep
+            ON cep.class = 1 AND cep.major_id = o.object_id AND cep.minor_id = c.column_id
+            AND cep.name = 'MS_Description'
+        WHERE s.name = ? AND o.type IN ('U', 'V')
+        ORDER BY o.name, c.column_id;
+    """,
+    POSTGRES: """
+        SELECT cl.relname, a.attname, format_type(a.atttypid, a.atttypmod),
+               pk.conname IS NOT NULL,
+               rcl.relname, ra.attname,
+               obj_description(cl.oid, 'pg_class'), col_description(cl.oid, a.attnum)
+        FROM pg_class cl
+        JOIN pg_namespace n ON n.oid = cl.relnamespace
+        JOIN pg_attribute a ON a.attrelid = cl.oid AND a.attnum > 0 AND NOT a.attisdropped
+        LEFT JOIN pg_constraint pk
+            ON pk.conrelid = cl.oid AND pk.contype = 'p' AND a.attnum = ANY (pk.conkey)
+        LEFT JOIN pg_constraint fk
+            ON fk.conrelid = cl.oid AND fk.contype = 'f' AND a.attnum = ANY (fk.conkey)
+        LEFT JOIN pg_class rcl ON rcl.oid = fk.confrelid
+        LEFT JOIN pg_attribute ra
+            ON ra.attrelid = fk.confrelid AND ra.attnum = fk.confkey[array_position(fk.conkey, a.attnum)]
+        WHERE n.nspname = %s AND cl.relkind IN ('r', 'p', 'v', 'm')
+        ORDER BY cl.relname, a.attnum;
+    """,
+    # sqlite_master only lists the main database, so the schema name is expected to be "main".
+    # SQLite has no comments.
+    SQLITE: """
+        SELECT m.name, p.name, p.type, p.pk > 0, f."table", f."to", NULL, NULL
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name, ?1) p
+        LEFT JOIN pragma_foreign_key_list(m.name, ?1) f ON f."from" = p.name
+        WHERE m.type IN ('table', 'view') AND m.name NOT LIKE 'sqlite_%'
+        ORDER BY m.name, p.cid;
+    """,
+}
+
+# {"columns": {name: type}, "primary_key": [names], "foreign_keys": [(col, table, col)],
+#  "comment": table comment or "", "column_comments": {name: comment}}
+TableSchema = Dict[str, Any]
+
+
+def group_schema_rows(rows: Iterable[Tuple]) -> Dict[str, TableSchema]:
+    """Group (table, column, type, is_pk, ref_table, ref_column, table_comment, column_comment) rows by table."""
+    schema: Dict[str, TableSchema] = {}
+    for table, column, data_type, is_pk, ref_table, ref_column, table_comment, column_comment in rows:
+        entry = schema.get(table)
+        if entry is None:
+            entry = schema[table] = {
+                "columns": {}, "primary_key": [], "foreign_keys": [], "comment": table_comment or "",
+                "column_comments": {},
+            }
+        if column not in entry["columns"]:
+            entry["columns"][column] = data_type
+            if is_pk:
+                entry["primary_key"].append(column)
+            if column_comment:
+                entry["column_comments"][column] = column_comment
+        if ref_table:
+            entry["foreign_keys"].append((column, ref_table, ref_column))
+    return schema
+
+
+def introspect_schema(cursor: Any, dialect: str, schema_name: str) -> Dict[str, TableSchema]:
+    """Load every table of schema_name with one query on an open cursor."""
+    cursor.execute(SCHEMA_QUERIES[dialect], (schema_name,))
+    return group_schema_rows(cursor.fetchall())
+
+
+def describe_columns(schema: Dict[str, TableSchema]) -> Dict[str, Dict[str, str]]:
+    """
+    Flatten introspected tables to {table: {column: type}}, the shape fetch_table_structure
+    has always returned, with key columns marked, e.g. "int PK" or "int FK -> orders.id".
+    """
+    described = {}
+    for table, entry in schema.items():
+        references: Dict[str, List[str]] = {}
+        for column, ref_table, ref_column in entry["foreign_keys"]:
+            # SQLite leaves the column out when the reference is to the parent's primary key.
+            references.setdefault(column, []).append(f"{ref_table}.{ref_column}" if ref_column else ref_table)
+        columns = {}
+        for column, data_type in entry["columns"].items():
+            label = str(data_type)
+            if column in entry["primary_key"]:
+                label += " PK"
+            if column in references:
+                label += " FK -> " + ", ".join(references[column])
+            columns[column] = label
+        described[table] = columns
+    return described
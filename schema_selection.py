@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pdf_retrieval
+import schema_introspection
+
+# Relevance-ranked schema context for the prompt, in place of the repr of every
+# table. Each table becomes one BM25 document (pdf_retrieval.BM25Index) made of
+# its name, column names and comments. The user requirement picks the top
+# tables; tables joined to them by a foreign key follow, and each is rendered
+# compactly as "table(col type PK, col type FK -> t.col, ...)". Tables are added
+# until SCHEMA_CONTEXT_TOKEN_BUDGET is reached, so the prompt stays the same
+# size however many tables the database has.
+SCHEMA_TOP_TABLES = int(os.environ.get("SCHEMA_TOP_TABLES", "8"))
+SCHEMA_NEIGHBOURS = int(os.environ.get("SCHEMA_NEIGHBOURS", "3"))
+SCHEMA_MAX_COLUMNS = int(os.environ.get("SCHEMA_MAX_COLUMNS", "24"))
+SCHEMA_CONTEXT_TOKEN_BUDGET = int(os.environ.get("SCHEMA_CONTEXT_TOKEN_BUDGET", "1200"))
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_WORD = re.compile(r"[a-z0-9]+")
+
+_index_lock = threading.Lock()
+_last_index: Optional[Tuple[Dict[str, schema_introspection.TableSchema], "SchemaIndex"]] = None
+
+
+def _words(text: str) -> str:
+    """Split identifiers (snake_case, CamelCase) into words and add naive singulars, so
+    "SystemRequirements" and "system requirement" share terms."""
+    words = _WORD.findall(_CAMEL_BOUNDARY.sub(" ", str(text)).lower())
+    singulars = []
+    for word in words:
+        if word.endswith("ies") and len(word) > 4:
+            singulars.append(word[:-3] + "y")
+        elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+            singulars.append(word[:-1])
+    return " ".join(words + singulars)
+
+
+class SchemaIndex:
+    """BM25 index over the tables of an introspected schema, plus its foreign-key graph."""
+
+    def __init__(self, schema: Dict[str, schema_introspection.TableSchema]):
+        self.schema = schema
+        self.tables = sorted(schema)
+        documents = []
+        for name in self.tables:
+            entry = schema[name]
+            columns = " ".join(entry["columns"])
+            comments = " ".join([entry.get("comment", "")] + list(entry.get("column_comments", {}).values()))
+            # The table name goes in both fields, so it weighs more than any single column.
+            documents.append({"section": _words(name), "text": _words(f"{name} {columns} {comments}")})
+        self.bm25 = pdf_retrieval.BM25Index(documents)
+        self.neighbours: Dict[str, List[str]] = {name: [] for name in self.tables}
+        for name in self.tables:
+            for _, ref_table, _ in schema[name]["foreign_keys"]:
+                if ref_table in self.neighbours and ref_table != name:
+                    if ref_table not in self.neighbours[name]:
+                        self.neighbours[name].append(ref_table)
+                    if name not in self.neighbours[ref_table]:
+                        self.neighbours[ref_table].append(name)
+
+    def rank(self, query: str, top_n: int = SCHEMA_TOP_TABLES) -> List[str]:
+        """The top_n tables for query, best first; the most connected tables when nothing matches."""
+        ranked = self.bm25.search(_words(query), top_n)
+        if ranked:
+            return [self.tables[i] for i in ranked]
+        by_degree = sorted(self.tables, key=lambda name: -len(self.neighbours[name]))
+        return by_degree[:top_n]
+
+
+def get_schema_index(schema: Dict[str, schema_introspection.TableSchema]) -> SchemaIndex:
+    """Index schema, reusing the last index while the schema cache returns the same snapshot."""
+    global _last_index
+    with _index_lock:
+        if _last_index is not None and _last_index[0] is schema:
+            return _last_index[1]
+    index = SchemaIndex(schema)
+    with _index_lock:
+        _last_index = (schema, index)
+    return index
+
+
+def describe_table(name: str, entry: schema_introspection.TableSchema, max_columns: int = SCHEMA_MAX_COLUMNS) -> str:
+    """One-line rendering of a table; key columns come first and long column lists are cut."""
+    labels = schema_introspection.describe_columns({name: entry})[name]
+    keys = set(entry["primary_key"]) | {column for column, _, _ in entry["foreign_keys"]}
+    ordered = [c for c in labels if c in keys] + [c for c in labels if c not in keys]
+    shown = [f"{column} {labels[column]}" for column in ordered[:max_columns]]
+    if len(ordered) > max_columns:
+        shown.append(f"... {len(ordered) - max_columns} more")
+    line = f"{name}({', '.join(shown)})"
+    if entry.get("comment"):
+        line += f" -- {entry['comment']}"
+    return line
+
+
+def select_tables(schema: Dict[str, schema_introspection.TableSchema], query: str,
+                  required: Iterable[str] = (), top_n: int = SCHEMA_TOP_TABLES,
+                  neighbours: int = SCHEMA_NEIGHBOURS) -> List[str]:
+    """
+    Tables for the prompt in priority order: required ones (e.g. a table named in the
+    request), the top_n ranked for query, then up to `neighbours` FK neighbours of each.
+    """
+    index = get_schema_index(schema)
+    lookup = {name.lower(): name for name in index.tables}
+    chosen = [lookup[name.lower()] for name in required if name and name.lower() in lookup]
+    chosen += [name for name in index.rank(query, top_n) if name not in chosen]
+    for name in list(chosen):
+        for neighbour in index.neighbours[name][:neighbours]:
+            if neighbour not in chosen:
+                chosen.append(neighbour)
+    return chosen
+
+
+def build_schema_context(schema: Dict[str, schema_introspection.TableSchema], query: str,
+                         required: Iterable[str] = (), token_budget: Optional[int] = None) -> str:
+    """Compact description of the tables most relevant to query, bounded by token_budget."""
+    if not schema:
+        return "No database structure available."
+    budget = SCHEMA_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    lines, used = [], 0
+    for name in select_tables(schema, query, required):
+        line = describe_table(name, schema[name])
+        cost = pdf_retrieval.estimate_tokens(line)
+        if used + cost > budget:
+            continue
+        lines.append(line)
+        used += cost
+    if len(lines) < len(schema):
+        lines.append(f"({len(schema) - len(lines)} other tables not shown)")
+    return "\n".join(lines)
@@ -0,0 +1,191 @@
+import itertools
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Optional, Sequence
+
+import schema_introspection
+
+# Prepared statements, cached per connection, for the metadata and sampling
+# queries. Every query is parameterized, so repeated introspection and sampling
+# reuse the server's plan instead of compiling SQL text each time.
+#
+#   MS SQL    one ODBC cursor per statement: pypyodbc/pyodbc prepare on the first
+#             execute (SQLPrepare) and re-execute the handle while the SQL is unchanged
+#   Postgres  PREPARE stmt_n AS ... once per connection, then EXECUTE stmt_n (...)
+#             (except execute_streamed reads, which need a named cursor's DECLARE)
+#   SQLite    the sqlite3 module's own per-connection statement cache
+#   asyncpg   its built-in per-connection cache (db_async sets the size)
+#
+# The least recently used statements are dropped (DEALLOCATE / cursor close)
+# beyond DB_STATEMENT_CACHE_SIZE per connection.
+STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "64"))
+
+_PLACEHOLDER = re.compile(r"%s")
+_INVALID_STATEMENT_NAME = "26000"  # Postgres SQLSTATE when a prepared statement is missing
+_stream_names = itertools.count(1)
+
+
+def numbered_placeholders(query: str) -> str:
+    """Rewrite psycopg2-style %s placeholders as Postgres's $1, $2, ..."""
+    counter = iter(range(1, query.count("%s") + 1))
+    return _PLACEHOLDER.sub(lambda _: f"${next(counter)}", query)
+
+
+def _finish_cursor(cursor: Any) -> None:
+    # Read what is left of a result so the (non-MARS) connection is free again.
+    try:
+        cursor.fetchall()
+    except Exception:
+        pass
+
+
+def _server_side_cursor(conn: Any, itersize: int) -> Any:
+    cursor = conn.cursor(name=f"stream_{next(_stream_names)}")
+    cursor.itersize = itersize
+    return cursor
+
+
+class CachedConnection:
+    """
+    DB-API connection wrapper whose execute() runs statements prepared once per connection.
+    Everything else (cursor, commit, ...) goes to the wrapped connection, so the pool and
+    plain cursor code keep working. A cursor returned by execute() is only valid until the
+    next execute(), commit, rollback or close.
+    """
+
+    def __init__(self, conn: Any, dialect: str, capacity: int = STATEMENT_CACHE_SIZE):
+        self.raw = conn
+        self.dialect = dialect
+        self.capacity = max(capacity, 1)
+        self._statements: "OrderedDict[str, Any]" = OrderedDict()  # SQL -> cursor (MS SQL) or name (Postgres)
+        self._counter = 0
+        self._active: Optional[Any] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.raw, name)
+
+    def _settle(self) -> None:
+        if self._active is not None:
+            cursor, self._active = self._active, None
+            if self.dialect == schema_introspection.MSSQL:
+                _finish_cursor(cursor)
+            else:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    def _evict(self) -> None:
+        while len(self._statements) > self.capacity:
+            _, statement = self._statements.popitem(last=False)
+            try:
+                if self.dialect == schema_introspection.MSSQL:
+                    statement.close()
+                else:
+                    cursor = self.raw.cursor()
+                    cursor.execute(f"DEALLOCATE {statement}")
+                    cursor.close()
+            except Exception as e:
+                print(f"Error releasing prepared statement: {e}")
+
+    def _execute_mssql(self, query: str, params: Sequence[Any]) -> Any:
+        cursor = self._statements.get(query)
+        if cursor is None:
+            cursor = self._statements[query] = self.raw.cursor()
+            self._evict()
+        else:
+            self._statements.move_to_end(query)
+        cursor.execute(query, tuple(params))
+        return cursor
+
+    def _execute_postgres(self, query: str, params: Sequence[Any]) -> Any:
+        cursor = self.raw.cursor()
+        name = self._statements.get(query)
+        if name is None:
+            self._counter += 1
+            name = f"stmt_{self._counter}"
+            cursor.execute(f"PREPARE {name} AS {numbered_placeholders(query.strip().rstrip(';'))}")
+            self._statements[query] = name
+            self._evict()
+        else:
+            self._statements.move_to_end(query)
+        arguments = f" ({', '.join(['%s'] * len(params))})" if params else ""
+        cursor.execute(f"EXECUTE {name}{arguments}", tuple(params))
+        return cursor
+
+    def execute(self, query: str, params: Sequence[Any] = ()) -> Any:
+        """Run a parameterized query (the driver's placeholder style) and return a cursor over its rows."""
+        self._settle()
+        if self.dialect == schema_introspection.MSSQL:
+            cursor = self._execute_mssql(query, params)
+        elif self.dialect == schema_introspection.POSTGRES:
+            try:
+                cursor = self._execute_postgres(query, params)
+            except Exception as e:
+                if getattr(e, "pgcode", None) != _INVALID_STATEMENT_NAME:
+                    raise
+                # The session lost its statements (e.g. DISCARD ALL); prepare again.
+                self.raw.rollback()
+                self._statements.clear()
+                cursor = self._execute_postgres(query, params)
+        else:
+            cursor = self.raw.cursor()
+            cursor.execute(query, tuple(params))
+        self._active = cursor
+        return cursor
+
+    def execute_streamed(self, query: str, params: Sequence[Any], itersize: int) -> Any:
+        """execute() for large reads; on Postgres a server-side cursor (see execute_streamed below)."""
+        if self.dialect != schema_introspection.POSTGRES:
+            return self.execute(query, params)
+        self._settle()
+        cursor = _server_side_cursor(self.raw, itersize)
+        cursor.execute(query, tuple(params))
+        self._active = cursor
+        return cursor
+
+    def commit(self) -> None:
+        self._settle()
+        self.raw.commit()
+
+    def rollback(self) -> None:
+        self._settle()
+        self.raw.rollback()
+
+    def close(self) -> None:
+        self._settle()
+        if self.dialect == schema_introspection.MSSQL:
+            for cursor in self._statements.values():
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+        self._statements.clear()  # Postgres statements end with the session
+        self.raw.close()
+
+
+def execute(conn: Any, query: str, params: Sequence[Any] = ()) -> Any:
+    """Run query through conn's statement cache when it has one, else on a plain cursor."""
+    if isinstance(conn, CachedConnection):
+        return conn.execute(query, params)
+    cursor = conn.cursor()
+    cursor.execute(query, tuple(params))
+    return cursor
+
+
+def execute_streamed(conn: Any, dialect: str, query: str, params: Sequence[Any], itersize: int) -> Any:
+    """
+    Run a query whose rows are read a batch at a time. On Postgres this is a psycopg2 named
+    (server-side) cursor, so each fetchmany pulls rows from the server instead of slicing a
+    result the client already buffered whole. A named cursor wraps its query in DECLARE ...
+    CURSOR, which cannot EXECUTE a prepared statement, so these reads skip the statement cache.
+    It needs an open transaction (the pool's connections are not in autocommit).
+    """
+    if isinstance(conn, CachedConnection):
+        return conn.execute_streamed(query, params, itersize)
+    if dialect == schema_introspection.POSTGRES:
+        cursor = _server_side_cursor(conn, itersize)
+        cursor.execute(query, tuple(params))
+        return cursor
+    return execute(conn, query, params)
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# System-type detection for the visualizations. The taxonomy (system types and
+# weighted keywords) is read from SYSTEM_TAXONOMY_PATH and compiled into an
+# Aho-Corasick automaton, so one scan of the lowercased text finds every
+# keyword however large the taxonomy grows. Types are ranked by the summed
+# weight of their hits; ties go to the type listed first in the config.
+TAXONOMY_PATH = os.environ.get(
+    "SYSTEM_TAXONOMY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "system_taxonomy.json")
+)
+
+_taxonomy: Optional["SystemTaxonomy"] = None
+_lock = threading.Lock()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords; each keyword carries a payload index."""
+
+    def __init__(self, keywords: List[Tuple[str, int]]):
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[Tuple[int, int]]] = [[]]
+        for keyword, payload in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][char] = next_state
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                state = next_state
+            self.outputs[state].append((len(keyword), payload))
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                candidate = self.transitions[fallback].get(char, 0)
+                self.fail[next_state] = candidate if candidate != next_state else 0
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def scan(self, text: str) -> List[Tuple[int, int]]:
+        """Return (start offset, payload) for every keyword occurrence in text."""
+        hits = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(char, 0)
+            for length, payload in self.outputs[state]:
+                hits.append((position - length + 1, payload))
+        return hits
+
+
+class SystemTaxonomy:
+    """Compiled system-type taxonomy."""
+
+    def __init__(self, config: Dict):
+        default = config.get("default", {})
+        self.default = (default.get("name", "Generic System"), default.get("id", "SYS"))
+        self.systems: List[Tuple[str, str]] = []
+        self.weights: List[Tuple[int, float]] = []
+        keywords = []
+        for system in config.get("systems", []):
+            system_index = len(self.systems)
+            self.systems.append((system["name"], system["id"]))
+            for keyword, weight in system.get("keywords", {}).items():
+                keywords.append((keyword.lower(), len(self.weights)))
+                self.weights.append((system_index, float(weight)))
+        self.automaton = KeywordAutomaton(keywords)
+
+    def rank(self, text: str) -> List[Tuple[str, str, float]]:
+        """Return (name, id, score) for every system type with a keyword in text, best first."""
+        lowered = text.lower()
+        scores: Dict[int, float] = {}
+        for start, keyword_index in self.automaton.scan(lowered):
+            # Keywords must start a word: "iot" should not fire inside "pilot".
+            if start > 0 and lowered[start - 1].isalnum():
+                continue
+            system_index, weight = self.weights[keyword_index]
+            scores[system_index] = scores.get(system_index, 0.0) + weight
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.systems[i][0], self.systems[i][1], score) for i, score in ranked]
+
+    def detect(self, text: str) -> Tuple[str, str]:
+        """Return (name, id) of the best-ranked system type, or the configured default."""
+        ranked = self.rank(text)
+        return (ranked[0][0], ranked[0][1]) if ranked else self.default
+
+
+def load_taxonomy(path: str = TAXONOMY_PATH) -> SystemTaxonomy:
+    """Read and compile a taxonomy config file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return SystemTaxonomy(json.load(f))
+
+
+def get_taxonomy() -> SystemTaxonomy:
+    """Return the process-wide taxonomy, compiling it from TAXONOMY_PATH on first use."""
+    global _taxonomy
+    if _taxonomy is None:
+        with _lock:
+            if _taxonomy is None:
+                _taxonomy = load_taxonomy()
+    return _taxonomy
+
+
+def detect_system_type(text: str) -> Tuple[str, str]:
+    """Return (system type name, system id) for the requirement text."""
+    return get_taxonomy().detect(text)
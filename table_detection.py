@@ -0,0 +1,189 @@
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Finds every real table mentioned in a requirement, not only "table <name>".
+# Table names and the text go through the same tokenizer: identifiers are split
+# on underscores and CamelCase, lowercased, and plurals are reduced, so
+# "SystemRequirements", "system_requirements" and "system requirement" are all
+# the words (system, requirement). A word-level trie over the table names is
+# walked from every text position; each text word may match a table word
+# exactly or, for longer words, within a small edit distance. Fuzzy word
+# lookups use a deletion-neighbourhood index (as in SymSpell), built with the
+# name index: every vocabulary word is stored under each string reachable by
+# deleting up to max_edits characters, so a lookup only generates the few
+# deletions of the text word, looks them up and verifies the candidates with a
+# bounded Levenshtein check. Cold lookups therefore cost about as much as warm
+# ones and stay sub-millisecond over tens of thousands of tables.
+TABLE_DETECT_MAX = int(os.environ.get("TABLE_DETECT_MAX", "5"))
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+_WORD = re.compile(r"[a-z0-9]+")
+_EXPLICIT = re.compile(r"\btable\s+([a-zA-Z0-9_]+)", re.IGNORECASE)
+_MAX_MEMO = 50000
+
+_index_lock = threading.Lock()
+_last_index: Optional[Tuple[Iterable[str], "TableNameIndex"]] = None
+
+
+def explicit_mentions(text: str) -> List[str]:
+    """Names written as "table <name>", as typed."""
+    return [match.group(1) for match in _EXPLICIT.finditer(text)]
+
+
+def _singular(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def name_words(text: str) -> List[str]:
+    """Normalized words of an identifier or free text."""
+    return [_singular(w) for w in _WORD.findall(_CAMEL_BOUNDARY.sub(" ", text).lower())]
+
+
+def _edits_for_length(length: int) -> int:
+    if length < 5:
+        return 0
+    return 1 if length < 9 else 2
+
+
+def max_edits(word: str) -> int:
+    """Edit distance tolerated for a word: none for short words and numbers, then 1, then 2."""
+    return 0 if word.isdigit() else _edits_for_length(len(word))
+
+
+def deletions(word: str, depth: int) -> Set[str]:
+    """word and every string reachable from it by deleting up to depth characters."""
+    found, frontier = {word}, {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def index_depth(length: int) -> int:
+    """Deletions to index for a vocabulary word of length: the largest max_edits of any text word that may match it."""
+    nearby = range(max(length - 2, 0), length + 3)
+    return max((_edits_for_length(n) for n in nearby if abs(n - length) <= _edits_for_length(n)), default=0)
+
+
+def within_distance(a: str, b: str, limit: int) -> bool:
+    """Levenshtein(a, b) <= limit, computed only on the diagonal band that can stay within limit."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [limit + 1] * len(b)
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            row[j] = min(row[j - 1] + 1, previous[j] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+        if min(row) > limit:
+            return False
+        previous = row
+    return previous[-1] <= limit
+
+
+class _WordNode:
+    __slots__ = ("children", "tables")
+
+    def __init__(self):
+        self.children: Dict[str, "_WordNode"] = {}
+        self.tables: List[str] = []
+
+
+class TableNameIndex:
+    """Word trie over table names plus a deletion-neighbourhood index over their vocabulary for fuzzy word lookups."""
+
+    def __init__(self, table_names: Iterable[str]):
+        self.tables = list(table_names)
+        self._exact = {name.lower(): name for name in self.tables}
+        self._root = _WordNode()
+        self.vocabulary: Set[str] = set()
+        for name in self.tables:
+            words = name_words(name)
+            if not words:
+                continue
+            node = self._root
+            for word in words:
+                node = node.children.setdefault(word, _WordNode())
+                self.vocabulary.add(word)
+            node.tables.append(name)
+        self._deletions: Dict[str, List[str]] = {}
+        for word in self.vocabulary:
+            for deleted in deletions(word, index_depth(len(word))):
+                self._deletions.setdefault(deleted, []).append(word)
+        self._memo: Dict[str, Set[str]] = {}
+        self._memo_lock = threading.Lock()
+
+    def similar_words(self, word: str) -> Set[str]:
+        """Vocabulary words within max_edits(word) of word (memoized)."""
+        found = self._memo.get(word)
+        if found is not None:
+            return found
+        limit = max_edits(word)
+        if limit == 0:
+            found = {word} if word in self.vocabulary else set()
+        else:
+            candidates = {c for deleted in deletions(word, limit) for c in self._deletions.get(deleted, ())}
+            found = {c for c in candidates if within_distance(word, c, limit)}
+        with self._memo_lock:
+            if len(self._memo) >= _MAX_MEMO:
+                self._memo.clear()
+            self._memo[word] = found
+        return found
+
+    def _longest_match(self, words: Sequence[str], start: int) -> Tuple[int, List[str]]:
+        # Depth-first over the word trie; exact word matches are tried before fuzzy ones.
+        best: Tuple[int, List[str]] = (0, [])
+        stack = [(self._root, start)]
+        while stack:
+            node, position = stack.pop()
+            if node.tables and position - start > best[0]:
+                best = (position - start, node.tables)
+            if position >= len(words):
+                continue
+            word = words[position]
+            candidates = self.similar_words(word) & node.children.keys()
+            for candidate in sorted(candidates, key=lambda c: c == word):
+                stack.append((node.children[candidate], position + 1))
+        return best
+
+    def find(self, text: str, limit: int = TABLE_DETECT_MAX) -> List[str]:
+        """Tables mentioned in text, in order of first mention; "table <name>" mentions come first."""
+        found: List[str] = []
+        for mention in explicit_mentions(text):
+            name = self._exact.get(mention.lower())
+            if name and name not in found:
+                found.append(name)
+        words = name_words(text)
+        position = 0
+        while position < len(words) and len(found) < limit:
+            length, tables = self._longest_match(words, position)
+            if not length:
+                position += 1
+                continue
+            for name in tables:
+                if name not in found:
+                    found.append(name)
+            position += length
+        return found[:limit]
+
+
+def get_table_index(table_names: Iterable[str]) -> TableNameIndex:
+    """Index table_names, reusing the last index while the same name collection is passed."""
+    global _last_index
+    with _index_lock:
+        if _last_index is not None and _last_index[0] is table_names:
+            return _last_index[1]
+    index = TableNameIndex(table_names)
+    with _index_lock:
+        _last_index = (table_names, index)
+    return index
+
+
+def detect_tables(table_names: Iterable[str], text: str, limit: int = TABLE_DETECT_MAX) -> List[str]:
+    """Real table names mentioned in text (see TableNameIndex.find)."""
+    return get_table_index(table_names).find(text, limit)
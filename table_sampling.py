@@ -0,0 +1,239 @@
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import schema_introspection
+import statement_cache
+
+# Representative, bounded row samples for the prompt (fetch_specific_table).
+#
+# SamplePlan only builds queries for MS SQL, PostgreSQL and SQLite; the callers
+# run them (pooled DB-API connections here, asyncpg in db_async). A sample takes
+# two round trips:
+#   1. stats: the catalog row estimate, plus MIN/MAX of an integer primary key
+#   2. the sample itself, using one of these methods:
+#      keyset       one index seek per stratum of the key range (large tables with an integer PK)
+#      tablesample  TABLESAMPLE SYSTEM sized from the row estimate (other large tables;
+#                   random rowid probes on SQLite)
+#      random       ORDER BY NEWID()/random() (tables up to SAMPLE_FULL_SCAN_ROWS)
+#      first        the first rows the engine returns (views, unknown tables, empty samples)
+# Text and binary columns are truncated in SQL to SAMPLE_MAX_COLUMN_BYTES, so
+# wide values never cross the wire, and rows are read SAMPLE_FETCH_BATCH at a
+# time through a server-side cursor on Postgres (psycopg2 named cursor, asyncpg
+# cursor), so the client never buffers more than a batch. Both queries are
+# parameterized and, on pooled connections, run as prepared statements
+# (statement_cache), except the Postgres sample read, which a named cursor
+# cannot prepare; the row limit is part of every query.
+SAMPLE_METHOD = os.environ.get("SAMPLE_METHOD", "auto")
+SAMPLE_MAX_COLUMN_BYTES = int(os.environ.get("SAMPLE_MAX_COLUMN_BYTES", "256"))
+SAMPLE_FETCH_BATCH = int(os.environ.get("SAMPLE_FETCH_BATCH", "100"))
+SAMPLE_FULL_SCAN_ROWS = int(os.environ.get("SAMPLE_FULL_SCAN_ROWS", "10000"))
+# TABLESAMPLE SYSTEM picks whole pages, so size the sample for several times the rows
+# needed and never below TABLESAMPLE_MIN_ROWS, or tiny percentages often hit no page.
+TABLESAMPLE_OVERSAMPLE = 4
+TABLESAMPLE_MIN_ROWS = 1000
+
+KEYSET, TABLESAMPLE, RANDOM, FIRST = "keyset", "tablesample", "random", "first"
+
+TEXT_TYPES = {
+    "char", "varchar", "nchar", "nvarchar", "text", "ntext", "xml", "sysname",
+    "character", "character varying", "json", "jsonb", "citext",
+}
+BINARY_TYPES = {"binary", "varbinary", "image", "bytea"}
+INTEGER_TYPES = {"tinyint", "smallint", "int", "bigint", "integer"}
+
+_TYPE_ARGS = re.compile(r"\(.*\)")
+
+Query = Tuple[str, Tuple]
+
+
+def base_type(data_type: str) -> str:
+    """Lowercased type name without size arguments, e.g. "timestamp(3) with time zone" -> "timestamp with time zone"."""
+    return " ".join(_TYPE_ARGS.sub("", str(data_type)).split()).lower()
+
+
+def quote_identifier(dialect: str, name: str) -> str:
+    """Quote a catalog identifier for dialect."""
+    if dialect == schema_introspection.MSSQL:
+        return "[" + name.replace("]", "]]") + "]"
+    return '"' + name.replace('"', '""') + '"'
+
+
+def find_table(schema: Dict[str, schema_introspection.TableSchema],
+               table_name: str) -> Tuple[str, Optional[schema_introspection.TableSchema]]:
+    """Return the catalog spelling and entry of table_name (case-insensitive), or (table_name, None)."""
+    if table_name in schema:
+        return table_name, schema[table_name]
+    lowered = table_name.lower()
+    for name, entry in schema.items():
+        if name.lower() == lowered:
+            return name, entry
+    return table_name, None
+
+
+class SamplePlan:
+    """Queries for sampling up to limit rows of one table; table is its introspected entry, if known."""
+
+    def __init__(self, dialect: str, schema_name: str, table_name: str,
+                 table: Optional[schema_introspection.TableSchema], limit: int,
+                 method: str = SAMPLE_METHOD, max_column_bytes: int = SAMPLE_MAX_COLUMN_BYTES):
+        self.dialect = dialect
+        self.limit = max(int(limit), 0)
+        self.table = table
+        self.max_column_bytes = max_column_bytes
+        self.requested_method = method
+        self.method = FIRST
+        self._param = "%s" if dialect == schema_introspection.POSTGRES else "?"
+        if table is None:
+            # Unknown to the catalog snapshot: the caller validated the name, keep it as written.
+            self._from = table_name
+            self._columns = "*"
+            self._key = None
+        else:
+            self._from = f"{quote_identifier(dialect, schema_name)}.{quote_identifier(dialect, table_name)}"
+            self._columns = ", ".join(self._column_expression(c, t) for c, t in table["columns"].items())
+            keys = table["primary_key"]
+            single_int_key = len(keys) == 1 and base_type(table["columns"][keys[0]]) in INTEGER_TYPES
+            self._key = keys[0] if single_int_key else None
+
+    def _column_expression(self, column: str, data_type: str) -> str:
+        quoted = quote_identifier(self.dialect, column)
+        base, cap = base_type(data_type), self.max_column_bytes
+        if base not in TEXT_TYPES and base not in BINARY_TYPES:
+            return quoted
+        if self.dialect == schema_introspection.MSSQL:
+            if base in TEXT_TYPES:
+                return f"LEFT(CAST({quoted} AS NVARCHAR(MAX)), {cap}) AS {quoted}"
+            return f"SUBSTRING({quoted}, 1, {cap}) AS {quoted}"
+        if self.dialect == schema_introspection.SQLITE:
+            return f"substr({quoted}, 1, {cap}) AS {quoted}"
+        if base in TEXT_TYPES:
+            return f"left({quoted}::text, {cap}) AS {quoted}"
+        return f"substring({quoted} from 1 for {cap}) AS {quoted}"
+
+    def stats_query(self) -> Optional[Query]:
+        """Row estimate (and key range) query, or None when the table is not in the catalog snapshot."""
+        if self.table is None or self.requested_method == FIRST:
+            return None
+        key_range = ""
+        if self._key:
+            key = quote_identifier(self.dialect, self._key)
+            key_range = f", (SELECT MIN({key}) FROM {self._from}), (SELECT MAX({key}) FROM {self._from})"
+        if self.dialect == schema_introspection.MSSQL:
+            estimate = ("SELECT SUM(p.rows) FROM sys.partitions p "
+                        "WHERE p.object_id = OBJECT_ID(?) AND p.index_id IN (0, 1)")
+        elif self.dialect == schema_introspection.SQLITE:
+            # No catalog estimate; the largest rowid is one b-tree seek (fails on views, see sample_table).
+            return f"SELECT (SELECT MAX(rowid) FROM {self._from}){key_range};", ()
+        else:
+            estimate = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)"
+        return f"SELECT ({estimate}){key_range};", (self._from,)
+
+    def _choose_method(self, rows: int, key_range: Sequence[Any]) -> str:
+        has_key_range = len(key_range) == 2 and None not in key_range
+        if self.requested_method != "auto":
+            if self.requested_method == KEYSET and not has_key_range:
+                return FIRST
+            if self.requested_method == TABLESAMPLE and rows <= 0:
+                return FIRST
+            return self.requested_method
+        if rows > SAMPLE_FULL_SCAN_ROWS:
+            return KEYSET if has_key_range else TABLESAMPLE
+        return RANDOM if rows > 0 else FIRST
+
+    def _limited(self, select: str, order_by: str = "") -> str:
+        """Render select (a "SELECT <columns> FROM ..." string) with the row limit for this dialect."""
+        if self.dialect == schema_introspection.MSSQL:
+            return select.replace("SELECT ", f"SELECT TOP ({self.limit}) ", 1) + order_by
+        return f"{select}{order_by} LIMIT {self._param}"
+
+    def sample_query(self, stats: Optional[Sequence[Any]] = None) -> Query:
+        """The sampling query, given the row returned by stats_query (None if it was skipped)."""
+        stats = list(stats or [])
+        rows = int(stats[0]) if stats and stats[0] is not None else 0
+        self.method = self._choose_method(rows, stats[1:])
+        mssql = self.dialect == schema_introspection.MSSQL
+        limit_args = () if mssql else (self.limit,)
+        select = f"SELECT {self._columns} FROM {self._from}"
+        if self.method == KEYSET:
+            low, high = int(stats[1]), int(stats[2])
+            strata = max(min(self.limit, high - low + 1), 1)
+            bounds = tuple(low + (high - low) * i // strata for i in range(strata))
+            key = quote_identifier(self.dialect, self._key)
+            seek = f"{select} WHERE {key} >= {self._param}"
+            seek = seek.replace("SELECT ", "SELECT TOP 1 ", 1) + f" ORDER BY {key}" if mssql else seek + f" ORDER BY {key} LIMIT 1"
+            parts = [f"SELECT * FROM ({seek}) s{i}" for i in range(strata)]
+            return " UNION ALL ".join(parts) + ";", bounds
+        if self.method == TABLESAMPLE:
+            wanted = max(self.limit * TABLESAMPLE_OVERSAMPLE, TABLESAMPLE_MIN_ROWS)
+            percent = min(100.0, 100.0 * wanted / max(rows, 1))
+            if mssql:
+                return self._limited(f"{select} TABLESAMPLE SYSTEM ({percent:.6f} PERCENT)") + ";", ()
+            if self.dialect == schema_introspection.SQLITE:
+                # No TABLESAMPLE in SQLite: probe random rowids below the largest one instead.
+                probes = min(wanted, rows)
+                query = (f"WITH RECURSIVE probe(n, id) AS (SELECT 1, abs(random()) % ? + 1 UNION ALL "
+                         f"SELECT n + 1, abs(random()) % ? + 1 FROM probe WHERE n < ?) "
+                         + self._limited(f"{select} WHERE rowid IN (SELECT id FROM probe)", " ORDER BY random()"))
+                return query + ";", (rows, rows, probes, self.limit)
+            return self._limited(f"{select} TABLESAMPLE SYSTEM (%s)") + ";", (percent, self.limit)
+        if self.method == RANDOM:
+            return self._limited(select, " ORDER BY NEWID()" if mssql else " ORDER BY random()") + ";", limit_args
+        return self.first_rows_query()
+
+    def first_rows_query(self) -> Query:
+        """Plain first-rows query; also the fallback when a page sample comes back empty."""
+        mssql = self.dialect == schema_introspection.MSSQL
+        return self._limited(f"SELECT {self._columns} FROM {self._from}") + ";", () if mssql else (self.limit,)
+
+    def needs_fallback(self, rows: List[Any]) -> bool:
+        return not rows and self.method == TABLESAMPLE
+
+    def _cap(self, value: Any) -> Any:
+        if isinstance(value, (str, bytes, bytearray)) and len(value) > self.max_column_bytes:
+            return value[:self.max_column_bytes]
+        return value
+
+    def finish(self, rows: List[Any]) -> List[Tuple]:
+        """Drop repeated keyset hits, cap values the SQL could not (SELECT * on unknown tables), trim to limit."""
+        if self.method == KEYSET:
+            key_index = list(self.table["columns"]).index(self._key)
+            seen, unique = set(), []
+            for row in rows:
+                if row[key_index] not in seen:
+                    seen.add(row[key_index])
+                    unique.append(row)
+            rows = unique
+        return [tuple(self._cap(v) for v in row) for row in rows[:self.limit]]
+
+
+def fetch_streamed(conn: Any, dialect: str, query: Query, limit: int,
+                   batch_size: int = SAMPLE_FETCH_BATCH) -> List[Any]:
+    """Run query and read at most limit rows, batch_size per fetchmany (server-side on Postgres)."""
+    cursor = statement_cache.execute_streamed(conn, dialect, *query, itersize=batch_size)
+    rows: List[Any] = []
+    while len(rows) < limit:
+        batch = cursor.fetchmany(min(batch_size, limit - len(rows)))
+        if not batch:
+            break
+        rows.extend(batch)
+    return rows
+
+
+def sample_table(conn: Any, dialect: str, schema_name: str, table_name: str,
+                 table: Optional[schema_introspection.TableSchema], limit: int) -> List[Tuple]:
+    """Sample up to limit rows of table_name over an open DB-API connection."""
+    plan = SamplePlan(dialect, schema_name, table_name, table, limit)
+    stats = None
+    stats_query = plan.stats_query()
+    if stats_query:
+        try:
+            stats = statement_cache.execute(conn, *stats_query).fetchone()
+        except Exception as e:
+            # e.g. a SQLite view has no rowid; fall back to the first rows.
+            print(f"Error estimating the size of table '{table_name}': {e}")
+            conn.rollback()
+    rows = fetch_streamed(conn, dialect, plan.sample_query(stats), plan.limit)
+    if plan.needs_fallback(rows):
+        rows = fetch_streamed(conn, dialect, plan.first_rows_query(), plan.limit)
+    return plan.finish(rows)
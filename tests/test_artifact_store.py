@@ -0,0 +1,103 @@
+import csv
+import io
+import sqlite3
+
+import artifact_store
+import db_backends
+import schema_introspection
+
+UNHEADED_OUTPUT = "Overview before any heading.\n# Architecture\nThree subsystems.\n## Power\nSolar arrays."
+
+
+class FakeCursor:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, query, params=()):
+        self.calls.append((query, list(params)))
+
+    def copy_expert(self, query, buffer):
+        self.calls.append((query, buffer.read()))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self):
+        self.cursors.append(FakeCursor())
+        return self.cursors[-1]
+
+
+def _run(source=""):
+    return {
+        "run_id": "a" * 32, "created_at": 1.5, "source": source, "prompt": "The rover shall drive. It shall stop.",
+        "outputs": {"system_design": UNHEADED_OUTPUT}, "timings": {"system_design": 0.25},
+    }
+
+
+def test_split_sections_keeps_text_before_first_heading():
+    assert artifact_store.split_sections(UNHEADED_OUTPUT) == [
+        ("", "Overview before any heading."), ("Architecture", "Three subsystems."), ("Power", "Solar arrays."),
+    ]
+
+
+def test_sqlite_round_trip_of_unheaded_section(tmp_path):
+    db_path = str(tmp_path / "artifacts.db")
+    writer = artifact_store.ArtifactWriter(db_backends.SQLiteBackend(db_path=db_path, create=True), flush_seconds=0)
+    writer.submit(_run())
+    writer.flush()
+    conn = sqlite3.connect(db_path)
+    try:
+        sections = conn.execute(
+            "SELECT position, heading, body FROM artifact_sections ORDER BY position;"
+        ).fetchall()
+        source = conn.execute("SELECT source FROM artifact_runs;").fetchone()[0]
+    finally:
+        conn.close()
+    assert sections[0] == (0, "", "Overview before any heading.")
+    assert [heading for _, heading, _ in sections] == ["", "Architecture", "Power"]
+    assert source == ""
+
+
+def test_postgres_copy_keeps_empty_strings_not_null():
+    conn = FakeConnection()
+    rows = artifact_store.run_rows(_run())["artifact_sections"]
+    columns = [name for name, _ in artifact_store.TABLES["artifact_sections"]]
+    artifact_store.bulk_insert(conn, schema_introspection.POSTGRES, "public", "artifact_sections", columns, rows)
+    query, data = conn.cursors[0].calls[0]
+    assert f"FORCE_NOT_NULL ({', '.join(columns)})" in query
+    parsed = list(csv.reader(io.StringIO(data)))
+    assert [tuple(str(v) for v in row) for row in rows] == [tuple(row) for row in parsed]
+    assert parsed[0][3] == ""
+
+
+def test_mssql_inserts_are_schema_qualified_multi_row_batches():
+    conn = FakeConnection()
+    columns = [name for name, _ in artifact_store.TABLES["artifact_sections"]]
+    rows = [("r" * 32, "system_design", i, "", "h" * 64, "body") for i in range(701)]
+    artifact_store.bulk_insert(conn, schema_introspection.MSSQL, "reports", "artifact_sections", columns, rows)
+    calls = conn.cursors[0].calls
+    assert all(query.startswith("INSERT INTO reports.artifact_sections ") for query, _ in calls)
+    assert all(len(params) <= artifact_store.MSSQL_MAX_PARAMS for _, params in calls)
+    assert len(calls) == 3  # 6 columns -> 349 rows per statement, plus a 3-row remainder
+    assert [value for _, params in calls for value in params] == [value for row in rows for value in row]
+
+
+def test_full_mssql_chunks_stay_under_the_request_parameter_limit():
+    for table, spec in artifact_store.TABLES.items():
+        conn = FakeConnection()
+        columns = [name for name, _ in spec]
+        rows = [tuple(range(len(columns)))] * 3000
+        artifact_store.bulk_insert(conn, schema_introspection.MSSQL, "dbo", table, columns, rows)
+        full_chunk = max(len(params) for _, params in conn.cursors[0].calls)
+        assert full_chunk < 2100, table  # sp_executesql needs a slot of its own
+
+
+def test_mssql_ddl_and_inserts_use_the_same_table_name():
+    statements = artifact_store.create_table_statements(schema_introspection.MSSQL, "reports")
+    assert any("CREATE TABLE reports.artifact_runs " in statement for statement in statements)
+    assert artifact_store.qualified_name(schema_introspection.MSSQL, "reports", "artifact_runs") == "reports.artifact_runs"
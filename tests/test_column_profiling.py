@@ -0,0 +1,39 @@
+import column_profiling
+import schema_introspection
+
+TABLE = {"columns": {"id": "integer", "name": "text"}, "primary_key": ["id"]}
+
+
+def _plan(sample_rows=100):
+    return column_profiling.ProfilePlan(schema_introspection.POSTGRES, "public", "parts", TABLE, sample_rows)
+
+
+def test_negative_reltuples_is_an_unknown_estimate():
+    plan = _plan()
+    full_sample = (100, 100, 100, 1, 100, 100, 7, "a", "z")
+    assert plan.read_aggregates(full_sample, (-1, None, None))["rows"] is None
+    assert plan.read_aggregates(full_sample, None)["rows"] is None
+    short_read = (40, 40, 40, 1, 40, 40, 7, "a", "z")  # fewer rows than the limit: the whole table
+    assert plan.read_aggregates(short_read, (-1, None, None))["rows"] == 40
+    assert plan.read_aggregates(full_sample, (5000, 1, 5000))["rows"] == 5000
+
+
+def test_distinct_counts_are_labelled_sample_level_for_partial_reads():
+    plan = _plan()
+    sampled = plan.read_aggregates((100, 100, 100, 1, 100, 100, 7, "a", "z"), (5000, 1, 5000))
+    text = column_profiling.describe_profile("parts", sampled)
+    assert "~5000 rows, 100 sampled" in text
+    assert "id integer: 0% null, unique in sample, 1 to 100" in text
+    assert "7 distinct in sample" in text
+    unknown = plan.read_aggregates((100, 100, 100, 1, 100, 100, 7, "a", "z"), (-1, None, None))
+    assert "first 100 rows" in column_profiling.describe_profile("parts", unknown)
+    assert "unique in sample" in column_profiling.describe_profile("parts", unknown)
+
+
+def test_whole_table_profiles_keep_plain_labels():
+    plan = _plan()
+    whole = plan.read_aggregates((40, 40, 40, 1, 40, 40, 7, "a", "z"), (40, 1, 40))
+    text = column_profiling.describe_profile("parts", whole)
+    assert "~40 rows)" in text
+    assert "id integer: 0% null, unique, 1 to 40" in text
+    assert "7 distinct," in text and "in sample" not in text
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+import ingest_corpus
+from pdf_source import PdfSource
+
+
+@pytest.fixture
+def tracked_sources(monkeypatch):
+    opened = []
+
+    class TrackedSource(PdfSource):
+        def __init__(self, path):
+            super().__init__(path)
+            opened.append(self)
+
+    monkeypatch.setattr(ingest_corpus, "PdfSource", TrackedSource)
+    return opened
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_every_mapped_source_is_closed(tmp_path, monkeypatch, tracked_sources):
+    def extract(pdf_file):
+        if b"broken" in pdf_file.read():
+            raise ValueError("unreadable page")
+        yield "1 INTRODUCTION\nThe rover shall drive."
+
+    monkeypatch.setattr(ingest_corpus.pdf_extraction, "iter_pdf_pages", extract)
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    _write(docs / "good.pdf", b"%PDF-1.4 good")
+    _write(docs / "broken.pdf", b"%PDF-1.4 broken")
+    db_path = str(tmp_path / "corpus.db")
+
+    counts = ingest_corpus.ingest_directory(str(docs), db_path)
+    assert (counts["added"], counts["failed"]) == (1, 1)
+
+    # Same bytes, new mtime: only the manifest is touched.
+    stat = os.stat(docs / "good.pdf")
+    os.utime(docs / "good.pdf", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    counts = ingest_corpus.ingest_directory(str(docs), db_path)
+    assert counts["touched"] == 1
+
+    assert len(tracked_sources) == 4
+    assert all(source._mmap is None for source in tracked_sources)
+
+
+def test_pdf_source_closes_on_leaving_a_with_block(tmp_path):
+    _write(tmp_path / "a.pdf", b"%PDF-1.4 a")
+    with PdfSource(str(tmp_path / "a.pdf")) as source:
+        assert source.open_view().read(4) == b"%PDF"
+    with pytest.raises(ValueError):
+        source.open_view()
@@ -0,0 +1,98 @@
+import os
+from io import BytesIO
+
+import PyPDF2
+import pytest
+
+import pdf_extraction
+import pdf_text_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_text_cache, "CACHE_DIR", str(tmp_path))
+    pdf_text_cache.clear_memory_cache()
+    yield tmp_path
+    pdf_text_cache.clear_memory_cache()
+
+
+def _pdf(pages=3):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=72, height=72)
+    out = BytesIO()
+    writer.write(out)
+    out.seek(0)
+    return out
+
+
+def test_complete_extraction_is_cached_in_memory_and_on_disk(cache_dir):
+    calls = []
+
+    def extract(pdf):
+        calls.append(pdf)
+        return ["one", "two"]
+
+    pdf = BytesIO(b"%PDF-1.4 complete")
+    assert pdf_text_cache.cached_pdf_pages(pdf, extract) == ["one", "two"]
+    assert pdf_text_cache.cached_pdf_pages(pdf, extract) == ["one", "two"]
+    assert len(calls) == 1
+    assert os.listdir(cache_dir) == [pdf_text_cache.pdf_file_digest(pdf) + ".txt"]
+
+
+def test_failed_extraction_propagates_and_is_not_cached(cache_dir):
+    def fail_part_way(pdf):
+        raise ValueError("page 2 unreadable")
+
+    pdf = BytesIO(b"%PDF-1.4 broken")
+    with pytest.raises(ValueError):
+        pdf_text_cache.cached_pdf_pages(pdf, fail_part_way)
+    assert pdf_text_cache.get_cached_pages(pdf_text_cache.pdf_file_digest(pdf)) is None
+    assert os.listdir(cache_dir) == []
+    assert pdf_text_cache.cached_pdf_pages(pdf, lambda f: ["fixed"]) == ["fixed"]
+
+
+def test_unreadable_page_fails_extraction_instead_of_yielding_a_blank(monkeypatch):
+    assert list(pdf_extraction.iter_pdf_pages(_pdf(), workers=1)) == ["", "", ""]
+
+    calls = []
+
+    def extract_text(page, *args, **kwargs):
+        calls.append(page)
+        if len(calls) == 2:
+            raise KeyError("/Contents")
+        return "text"
+
+    monkeypatch.setattr(PyPDF2.PageObject, "extract_text", extract_text)
+    pages = []
+    with pytest.raises(KeyError):
+        for page in pdf_extraction.iter_pdf_pages(_pdf(), workers=1):
+            pages.append(page)
+    assert pages == ["text"]
+
+
+def test_pages_stream_before_extraction_finishes_and_are_cached_after(cache_dir):
+    events = []
+
+    def extract(pdf):
+        for n in range(3):
+            events.append(f"extract {n}")
+            yield f"page {n}"
+
+    pdf = BytesIO(b"%PDF-1.4 streamed")
+    digest = pdf_text_cache.pdf_file_digest(pdf)
+    for page in pdf_text_cache.stream_pdf_pages(pdf, extract):
+        events.append(f"consume {page}")
+        if page == "page 0":
+            assert pdf_text_cache.get_cached_pages(digest) is None
+    assert events[:3] == ["extract 0", "consume page 0", "extract 1"]
+    assert pdf_text_cache.get_cached_pages(digest) == ["page 0", "page 1", "page 2"]
+
+
+def test_abandoned_stream_is_not_cached(cache_dir):
+    pdf = BytesIO(b"%PDF-1.4 abandoned")
+    pages = pdf_text_cache.stream_pdf_pages(pdf, lambda f: iter(["one", "two"]))
+    assert next(pages) == "one"
+    pages.close()
+    assert pdf_text_cache.get_cached_pages(pdf_text_cache.pdf_file_digest(pdf)) is None
+    assert os.listdir(cache_dir) == []
@@ -0,0 +1,83 @@
+import random
+import string
+
+import table_detection
+
+TABLES = [
+    "SystemRequirements", "system_requirement_links", "VerificationConditions", "test_cases",
+    "Sensors", "battery_cells", "telemetry_frames", "mission_phases_2024", "ups",
+]
+
+
+def _levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        row = [i]
+        for j, cb in enumerate(b, start=1):
+            row.append(min(row[j - 1] + 1, previous[j] + 1, previous[j - 1] + (ca != cb)))
+        previous = row
+    return previous[-1]
+
+
+def test_name_words_split_camel_case_underscores_and_plurals():
+    assert table_detection.name_words("SystemRequirements") == ["system", "requirement"]
+    assert table_detection.name_words("system_requirements") == ["system", "requirement"]
+    assert table_detection.name_words("HTTPServerLogs") == ["http", "server", "log"]
+    assert table_detection.name_words("the batteries, nodes and class") == ["the", "battery", "node", "and", "class"]
+
+
+def test_camel_case_and_plural_mentions_resolve_to_the_table():
+    index = table_detection.TableNameIndex(TABLES)
+    assert index.find("Each system requirement needs an owner.") == ["SystemRequirements"]
+    assert index.find("Store readings from all sensor units.") == ["Sensors"]
+    assert index.find("Log the battery cell voltages.") == ["battery_cells"]
+
+
+def test_word_trie_prefers_the_longest_table_name():
+    index = table_detection.TableNameIndex(TABLES)
+    assert index.find("Trace via the system requirement links.") == ["system_requirement_links"]
+    found = index.find("Verification conditions cover the test cases and telemetry frames.")
+    assert found == ["VerificationConditions", "test_cases", "telemetry_frames"]
+
+
+def test_fuzzy_matches_tolerate_typos_only_in_longer_words():
+    index = table_detection.TableNameIndex(TABLES)
+    assert index.find("Decode telemetery frames.") == ["telemetry_frames"]  # one insertion
+    assert index.find("List the verfication condtions.") == ["VerificationConditions"]  # two edits, long words
+    assert index.find("Restart the ups.") == ["ups"]
+    assert index.find("Restart the upx.") == []  # short words must match exactly
+    assert index.find("Plan mission phases 2025.") == []  # numbers must match exactly
+
+
+def test_explicit_mentions_come_first_and_limit_applies():
+    index = table_detection.TableNameIndex(TABLES)
+    text = "Sensors feed test cases; see table battery_cells."
+    assert index.find(text) == ["battery_cells", "Sensors", "test_cases"]
+    assert index.find(text, limit=2) == ["battery_cells", "Sensors"]
+
+
+def test_similar_words_match_brute_force_levenshtein():
+    rng = random.Random(3)
+    vocabulary = sorted({"".join(rng.choice("abcde") for _ in range(rng.randint(2, 11))) for _ in range(300)})
+    index = table_detection.TableNameIndex(vocabulary)
+    words = ["".join(rng.choice("abcde") for _ in range(rng.randint(3, 11))) for _ in range(400)]
+    words += [rng.choice(vocabulary) + rng.choice(string.ascii_lowercase[:5]) for _ in range(50)]
+    for word in words:
+        limit = table_detection.max_edits(word)
+        expected = {v for v in index.vocabulary if _levenshtein(word, v) <= limit}
+        assert index.similar_words(word) == expected, word
+
+
+def test_within_distance_agrees_with_levenshtein():
+    rng = random.Random(5)
+    for _ in range(500):
+        a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 8)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randint(0, 8)))
+        for limit in (0, 1, 2):
+            assert table_detection.within_distance(a, b, limit) == (_levenshtein(a, b) <= limit)
+
+
+def test_index_is_reused_for_the_same_name_collection():
+    names = list(TABLES)
+    assert table_detection.get_table_index(names) is table_detection.get_table_index(names)
+    assert table_detection.get_table_index(list(TABLES)) is not table_detection.get_table_index(names)
@@ -0,0 +1,72 @@
+import sqlite3
+
+import schema_introspection
+import statement_cache
+import table_sampling
+
+
+class FakePgCursor:
+    def __init__(self, rows, name=None):
+        self.name = name
+        self.itersize = 2000
+        self.rows = list(rows)
+        self.executed = []
+        self.fetches = []
+        self.closed = False
+
+    def execute(self, query, params=()):
+        self.executed.append((query, tuple(params)))
+
+    def fetchmany(self, size):
+        self.fetches.append(size)
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def fetchone(self):
+        return self.fetchmany(1)[0] if self.rows else None
+
+    def close(self):
+        self.closed = True
+
+
+class FakePgConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.cursors = []
+
+    def cursor(self, name=None):
+        cursor = FakePgCursor(self.rows if name else [], name)
+        self.cursors.append(cursor)
+        return cursor
+
+
+def test_postgres_reads_go_through_a_named_cursor_in_batches():
+    conn = FakePgConnection([(i,) for i in range(250)])
+    rows = table_sampling.fetch_streamed(conn, schema_introspection.POSTGRES,
+                                         ("SELECT id FROM t LIMIT %s;", (250,)), 230, batch_size=100)
+    assert len(rows) == 230
+    (cursor,) = conn.cursors
+    assert cursor.name and cursor.itersize == 100
+    assert cursor.executed == [("SELECT id FROM t LIMIT %s;", (250,))]
+    assert cursor.fetches == [100, 100, 30]
+
+
+def test_cached_connection_streams_outside_the_statement_cache_and_closes_the_cursor():
+    raw = FakePgConnection([(1,), (2,)])
+    conn = statement_cache.CachedConnection(raw, schema_introspection.POSTGRES)
+    rows = table_sampling.fetch_streamed(conn, schema_introspection.POSTGRES, ("SELECT 1;", ()), 5)
+    assert rows == [(1,), (2,)]
+    streamed = raw.cursors[0]
+    assert streamed.name and not any("PREPARE" in q for q, _ in streamed.executed)
+    conn.execute("SELECT 2;")
+    assert streamed.closed
+    assert raw.cursors[1].name is None and raw.cursors[1].executed[0][0].startswith("PREPARE")
+
+
+def test_sqlite_samples_use_plain_cursors(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "t.db"))
+    conn.execute("CREATE TABLE parts (id INTEGER PRIMARY KEY, name TEXT);")
+    conn.executemany("INSERT INTO parts (name) VALUES (?);", [(f"p{i}",) for i in range(50)])
+    schema = schema_introspection.introspect_schema(conn.cursor(), schema_introspection.SQLITE, "main")
+    rows = table_sampling.sample_table(conn, schema_introspection.SQLITE, "main", "parts", schema["parts"], 5)
+    assert len(rows) == 5 and all(name.startswith("p") for _, name in rows)
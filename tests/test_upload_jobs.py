@@ -0,0 +1,80 @@
+import io
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import upload_jobs
+from pdf_source import PdfSource
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_jobs, "UPLOAD_DIR", str(tmp_path))
+    yield tmp_path
+    monkeypatch.setattr(upload_jobs, "UPLOAD_JOB_TTL", 0)
+    upload_jobs.evict_jobs()
+
+
+@pytest.fixture
+def readable_pdfs(monkeypatch):
+    # Skip real extraction: every upload "contains" one page of text.
+    monkeypatch.setattr(upload_jobs, "_extract_pages", lambda pdf_file: ["Rover requirements."])
+    monkeypatch.setattr(upload_jobs.pdf_retrieval, "get_pdf_index",
+                        lambda pdf_file, extract: SimpleNamespace(chunks=["Rover requirements."]))
+
+
+def _finished(job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = upload_jobs.get_job(job_id)
+        if job["status"] in upload_jobs.FINISHED:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"upload {job_id} did not finish")
+
+
+def _upload(body=b"%PDF-1.4 not really a pdf"):
+    job = upload_jobs.start_upload(io.BytesIO(body), "spec.pdf")
+    return _finished(job["job_id"])
+
+
+def test_failed_upload_deletes_its_file(uploads):
+    job = _upload()
+    assert job["status"] == "failed"
+    assert os.listdir(uploads) == []
+
+
+def test_expired_jobs_are_closed_and_deleted(uploads, readable_pdfs, monkeypatch):
+    job = _upload()
+    assert job["status"] == "done"
+    view = upload_jobs.open_upload_view(job["job_id"])
+    monkeypatch.setattr(upload_jobs, "UPLOAD_JOB_TTL", 0)
+    assert upload_jobs.evict_jobs() == 1
+    assert upload_jobs.get_job(job["job_id"]) is None
+    assert upload_jobs.open_upload_view(job["job_id"]) is None
+    assert os.listdir(uploads) == []
+    assert view.read(5) == b"%PDF-"  # a request already reading keeps its mapping
+
+
+def test_least_recently_used_jobs_beyond_the_cap_are_dropped(uploads, readable_pdfs, monkeypatch):
+    monkeypatch.setattr(upload_jobs, "UPLOAD_MAX_JOBS", 2)
+    first, second = _upload(), _upload()
+    upload_jobs.get_job(first["job_id"])  # first is now the most recently used
+    third = _upload()
+    assert upload_jobs.get_job(second["job_id"]) is None
+    assert upload_jobs.get_job(first["job_id"]) is not None
+    assert sorted(os.listdir(uploads)) == sorted(f"{j['job_id']}.pdf" for j in (first, third))
+
+
+def test_closed_source_refuses_new_views(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4 body")
+    source = PdfSource(str(path))
+    view = source.open_view()
+    source.close()
+    source.close()
+    assert view.read() == b"%PDF-1.4 body"
+    with pytest.raises(ValueError):
+        source.open_view()
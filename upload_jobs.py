@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import pdf_extraction
+import pdf_retrieval
+import pdf_text_cache
+from pdf_source import PdfSource, PdfView
+
+# User-uploaded reference PDFs. Request bodies are streamed to UPLOAD_DIR in
+# fixed-size chunks, then a background worker extracts and indexes the PDF so
+# the request thread never blocks on parsing. Job state lives in this process.
+# Finished jobs are dropped once unused for UPLOAD_JOB_TTL seconds, or least
+# recently used first beyond UPLOAD_MAX_JOBS; that unmaps their PDF and deletes
+# the file. A failed job's file is deleted as soon as it fails.
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", "uploads")
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_WORKERS = int(os.environ.get("UPLOAD_WORKERS", "2"))
+UPLOAD_JOB_TTL = float(os.environ.get("UPLOAD_JOB_TTL", "3600"))
+UPLOAD_MAX_JOBS = int(os.environ.get("UPLOAD_MAX_JOBS", "100"))
+FINISHED = ("done", "failed")
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+class InvalidUpload(Exception):
+    """Raised when the uploaded body is not a PDF."""
+
+
+_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # least recently used first
+_last_used: Dict[str, float] = {}
+_sources: Dict[str, PdfSource] = {}
+_jobs_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="pdf-upload")
+
+
+def _extract_pages(pdf_file: BinaryIO) -> Iterator[str]:
+    return pdf_text_cache.stream_pdf_pages(pdf_file, pdf_extraction.iter_pdf_pages)
+
+
+def save_upload_stream(stream: BinaryIO, dest_path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    """
+    Copy stream to dest_path UPLOAD_CHUNK_BYTES at a time, never holding the whole body in memory.
+    Returns the number of bytes written; removes the partial file on any error.
+    """
+    written = 0
+    try:
+        with open(dest_path, "wb") as out:
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if written == 0 and not chunk.startswith(b"%PDF-"):
+                    raise InvalidUpload("Uploaded file is not a PDF.")
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes.")
+                out.write(chunk)
+        if written == 0:
+            raise InvalidUpload("Uploaded file is empty.")
+        return written
+    except Exception:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+
+
+def _upload_path(job_id: str) -> str:
+    return os.path.join(UPLOAD_DIR, f"{job_id}.pdf")
+
+
+def _remove_file(path: str) -> None:
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"Error removing upload {path}: {e}")
+
+
+def _update_job(job_id: str, **fields: Any) -> None:
+    with _jobs_lock:
+        _jobs[job_id].update(fields)
+
+
+def _touch(job_id: str) -> None:
+    # Caller holds _jobs_lock.
+    _jobs.move_to_end(job_id)
+    _last_used[job_id] = time.monotonic()
+
+
+def evict_jobs() -> int:
+    """
+    Drop finished jobs unused for UPLOAD_JOB_TTL seconds, then the least recently used
+    finished jobs beyond UPLOAD_MAX_JOBS; closes their PDFs and deletes their files.
+    Queued and running jobs are never dropped. Returns the number of jobs dropped.
+    """
+    now = time.monotonic()
+    with _jobs_lock:
+        finished = [job_id for job_id, job in _jobs.items() if job["status"] in FINISHED]
+        expired = {job_id for job_id in finished if now - _last_used[job_id] > UPLOAD_JOB_TTL}
+        excess = len(_jobs) - len(expired) - UPLOAD_MAX_JOBS
+        for job_id in finished:
+            if excess <= 0:
+                break
+            if job_id not in expired:
+                expired.add(job_id)
+                excess -= 1
+        sources = []
+        for job_id in expired:
+            del _jobs[job_id]
+            del _last_used[job_id]
+            sources.append(_sources.pop(job_id, None))
+    for source in sources:
+        if source is not None:
+            source.close()
+    for job_id in expired:
+        _remove_file(_upload_path(job_id))
+    return len(expired)
+
+
+def _process_upload(job_id: str, path: str) -> None:
+    """Background step: map the saved PDF, extract its pages and build its retrieval index."""
+    _update_job(job_id, status="running")
+    source = None
+    try:
+        source = PdfSource(path)
+        pages: List[str] = []
+
+        def read_pages(pdf_file: BinaryIO) -> Iterator[str]:
+            # Pages are chunked for the index as they arrive from the extraction workers.
+            for page_text in _extract_pages(pdf_file):
+                pages.append(page_text)
+                yield page_text
+
+        index = pdf_retrieval.get_pdf_index(source.open_view(), read_pages)
+        if not pages:  # the index was already cached, so were its pages
+            pages = list(_extract_pages(source.open_view()))
+        if not any(pages):
+            raise InvalidUpload("No text could be extracted from the PDF.")
+        with _jobs_lock:
+            _sources[job_id] = source
+        _update_job(job_id, status="done", pages=len(pages), chunks=len(index.chunks),
+                    digest=source.digest, finished_at=time.time())
+    except Exception as e:
+        print(f"Error processing upload {job_id}: {e}")
+        if source is not None:
+            source.close()
+        _remove_file(path)
+        _update_job(job_id, status="failed", error=str(e), finished_at=time.time())
+
+
+def start_upload(stream: BinaryIO, filename: str) -> Dict[str, Any]:
+    """Stream an upload to disk and queue its extraction; returns the new job's status."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    path = _upload_path(job_id)
+    size = save_upload_stream(stream, path)
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "filename": os.path.basename(filename or "upload.pdf"),
+            "bytes": size,
+            "status": "queued",
+            "created_at": time.time(),
+        }
+        _touch(job_id)
+    evict_jobs()
+    _executor.submit(_process_upload, job_id, path)
+    return get_job(job_id)
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return a copy of the job's status record, or None for an unknown id."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        _touch(job_id)
+        return dict(job)
+
+
+def open_upload_view(job_id: str) -> Optional[PdfView]:
+    """Return a per-request view of a finished upload, or None if it is unknown or not ready."""
+    with _jobs_lock:
+        source = _sources.get(job_id)
+        if source is None:
+            return None
+        _touch(job_id)
+        return source.open_view()